@@ -1,10 +1,7 @@
 import streamlit as st
 from streamlit_extras.switch_page_button import switch_page
-import requests 
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from utils.api_client import get_client
 
 st.set_page_config(page_title="MyRecommender", page_icon="😎", layout="wide", initial_sidebar_state="expanded")
 
@@ -17,7 +14,7 @@ st.sidebar.page_link('pages/3_🙂_Express_your_thoughts.py', icon='🧑')
 st.sidebar.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='🏃‍♂️')
 st.sidebar.markdown('---')
 
-API_BASE_URL = os.getenv("API__URL")
+client = get_client()
 
 # Help
 st.sidebar.subheader("Help")
@@ -118,9 +115,10 @@ else:
 # Footer
 st.sidebar.markdown("---")
 if st.sidebar.button("Logout", use_container_width=True):
-    res = requests.get(API_BASE_URL+"/clear")
+    res = client.get("/clear")
     st.session_state['authenticated'] = False
     st.session_state['user_data'] = None
+    st.session_state.pop('user_hydration', None)
 
 st.sidebar.markdown("Made with ❤️ /RP030")
         
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Compare uploading audio as-is with uploading it compacted (mono, resampled, silence-trimmed).
+
+    python -m benchmarks.bench_audio_upload [--audio clip.wav ...] [--uplink-mbps 10] [--url API]
+
+Defaults to the bundled sample in uploads/ plus a synthetic 30 s stereo
+44.1 kHz voice note. Loopback transfers are nearly free, so the latency is
+also modeled for the given uplink bandwidth: local time + bytes / bandwidth.
+The stub API labels audio by a hash of its bytes, so compare labels only
+against the real API (--url).
+"""
+import argparse
+import io
+import time
+import wave
+
+import numpy as np
+
+import stub_api
+from utils.api_client import ApiClient
+from utils.audio import classify_audio, preprocess_audio
+
+SAMPLE = "uploads/03-01-03-01-02-02-05.wav"
+
+
+def synthetic_voice_note(seconds=30, rate=44100):
+    """Stereo 16-bit WAV: bursts of harmonic "speech" between pauses, with 2 s of silence at each end."""
+    rng = np.random.default_rng(0)
+    t = np.arange(seconds * rate) / rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    voice = sum(np.sin(2 * np.pi * k * np.cumsum(pitch) / rate) / k for k in range(1, 6))
+    envelope = (np.sin(2 * np.pi * 0.7 * t) > -0.3) & (t > 2) & (t < seconds - 2)
+    mono = 0.3 * voice * envelope + 0.002 * rng.standard_normal(len(t))
+    stereo = np.stack([mono, 0.8 * mono], axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes((np.clip(stereo, -1, 1) * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def run(name, data, compact, url, uplink_mbps):
+    client = ApiClient(url)
+    start = time.perf_counter()
+    body = preprocess_audio(data) if compact else data
+    prepared = time.perf_counter() - start
+    emotion = classify_audio(client, "clip.wav", body)
+    elapsed = time.perf_counter() - start
+    modeled = elapsed + len(body) * 8 / (uplink_mbps * 1e6)
+    print(f"{name:>10}: {len(body) / 1024:9.1f} KB  {1000 * prepared:7.1f} ms prep  {elapsed:6.3f} s local  "
+          f"{modeled:6.3f} s modeled  -> {emotion}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", nargs='*', default=[])
+    parser.add_argument("--uplink-mbps", type=float, default=10.0)
+    parser.add_argument("--url", help="API to benchmark against instead of the local stub")
+    args = parser.parse_args()
+
+    url = args.url or stub_api.base_url(stub_api.serve())
+    clips = [(path, open(path, 'rb').read()) for path in args.audio or [SAMPLE]]
+    if not args.audio:
+        clips.append(("synthetic 30 s stereo 44.1 kHz", synthetic_voice_note()))
+
+    for name, data in clips:
+        with wave.open(io.BytesIO(data)) as wav:
+            info = f"{wav.getnchannels()} ch, {wav.getframerate()} Hz, {wav.getnframes() / wav.getframerate():.2f} s"
+        print(f"{name} ({len(data) / 1024:.0f} KB, {info}), modeled uplink {args.uplink_mbps:g} Mbit/s")
+        run("as-is", data, False, url, args.uplink_mbps)
+        run("compact", data, True, url, args.uplink_mbps)
@@ -0,0 +1,74 @@
+"""
+Throughput of bulk journal import against the stub classifier.
+
+    python -m benchmarks.bench_bulk_import [--entries 400] [--latency 0.05] [--item-latency 0.01]
+
+`--latency` is the stub's delay per request (network and queueing) and
+`--item-latency` its model time per classified text. Compares one
+/text_classification call per entry (what clicking "Add to Diary" does)
+against batches over a thread pool, with and without the batch endpoint.
+"""
+import argparse
+import io
+import json
+import time
+
+import stub_api
+from utils import journal
+from utils.api_client import ApiClient
+from utils.journal import classify_batch, classify_batches, iter_batches, iter_entries
+
+
+def journal_jsonl(entries):
+    lines = [json.dumps({'date': f"2024-01-{1 + i % 28:02d}", 'text': f"Entry {i}: today I felt things"})
+             for i in range(entries)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def sequential(client, data, batch_size, workers):
+    count = version = 0
+    for entry in iter_entries(io.BytesIO(data), "journal.jsonl"):
+        response = client.post("/text_classification", data={'input_text': entry['text'], 'since': version,
+                                                              'email': "bench@example.com"})
+        response.raise_for_status()
+        version = response.json()['notes_delta']['version']
+        count += 1
+    return count
+
+
+def batched(batch_endpoint):
+    def run(client, data, batch_size, workers):
+        journal._batch_supported[client.base_url] = batch_endpoint
+        batches = iter_batches(iter_entries(io.BytesIO(data), "journal.jsonl"), batch_size)
+        results = classify_batches(lambda batch: classify_batch(client, "bench@example.com", "en", batch, 0),
+                                   batches, workers=workers)
+        return sum(len(batch) for batch, _, error in results if error is None)
+    return run
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--item-latency", type=float, default=0.01)
+    parser.add_argument("--batch-size", type=int, default=journal.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    data = journal_jsonl(args.entries)
+    modes = [("sequential, 1 per request", sequential, 1),
+             ("per-entry calls, 4 workers", batched(False), 4),
+             ("batch endpoint, 1 worker", batched(True), 1),
+             ("batch endpoint, 4 workers", batched(True), 4),
+             ("batch endpoint, 8 workers", batched(True), 8)]
+    print(f"{args.entries} entries, {args.latency * 1000:.0f} ms/request, {args.item_latency * 1000:.0f} ms/text, "
+          f"batches of {args.batch_size}")
+    print(f"{'mode':<28} {'seconds':>8} {'entries/s':>10}")
+    for name, run, workers in modes:
+        # A fresh stub per mode so every run starts from an empty diary
+        server = stub_api.serve(latency=args.latency, item_latency=args.item_latency)
+        client = ApiClient(stub_api.base_url(server))
+        start = time.perf_counter()
+        count = run(client, data, args.batch_size, workers)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28} {elapsed:>8.2f} {count / elapsed:>10.1f}")
+        server.shutdown()
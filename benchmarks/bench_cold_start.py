@@ -0,0 +1,115 @@
+"""
+Cold start of each page: import time and time to first render.
+
+    python -m benchmarks.bench_cold_start [--notes 500] [--repeat 3] [--page PAGE ...]
+
+Every measurement runs in a fresh interpreter that has already imported
+Streamlit, as a server worker has. The stub API runs in a process of its
+own so its imports don't warm the app's. "imports" times the page's
+module-level imports on their own. "first render" signs in to the stub
+through `AppTest` and times the page's first run, which includes those
+imports; "rerun" times the run after it, once everything is loaded.
+"heavy modules" lists the heavy dependencies the first render loaded.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PAGES = ["Home.py", "pages/Sign In.py", "pages/1_📘_Type_your_thoughts.py", "pages/2_🎙️_Speak_your_thoughts.py",
+         "pages/3_🙂_Express_your_thoughts.py", "pages/4_🏃‍♂️_Recommendations_for_you.py"]
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "plotly.graph_objects", "cv2", "PIL.Image")
+
+
+def import_block(page):
+    """The module-level import statements of a page, compiled on their own."""
+    with open(page, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), page)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return compile(ast.Module(body=imports, type_ignores=[]), page, 'exec')
+
+
+def time_imports(page):
+    code = import_block(page)
+    start = time.perf_counter()
+    exec(code, {'__name__': '__bench__'})
+    return {'imports_s': time.perf_counter() - start}
+
+
+def time_render(page, url):
+    from streamlit.testing.v1 import AppTest
+
+    os.environ['API__URL'] = url
+    at = AppTest.from_file("Home.py", default_timeout=120)
+    if page not in PAGES[:2]:
+        at.run()
+        at.switch_page("pages/Sign In.py")
+        at.run()
+        at.text_input[0].input("demo@example.com")
+        at.text_input[1].input("demo")
+        at.button[0].click().run()
+        at.switch_page(page)
+    elif page != "Home.py":
+        at.switch_page(page)
+
+    loaded = {name for name in HEAVY_MODULES if name in sys.modules}
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    assert not at.exception, [e.value for e in at.exception]
+    start = time.perf_counter()
+    at.run()
+    rerun = time.perf_counter() - start
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules and name not in loaded]
+    return {'first_render_s': first, 'rerun_s': rerun, 'heavy': heavy}
+
+
+def start_stub(notes):
+    """Start the stub API in its own process with the demo user; return the process and its URL."""
+    stub = subprocess.Popen([sys.executable, "-u", "stub_api.py", "--port", "0", "--demo-notes", str(notes)],
+                            stdout=subprocess.PIPE, text=True)
+    return stub, stub.stdout.readline().split()[-1]
+
+
+def measure(page, mode, url):
+    """Run one measurement in a fresh interpreter."""
+    command = [sys.executable, "-m", "benchmarks.bench_cold_start", "--child", mode, "--url", url, "--page", page]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page", action='append', choices=PAGES, help="page to measure (default: all)")
+    parser.add_argument("--child", choices=["imports", "render"], help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # A server worker has Streamlit loaded before it runs any page
+        import streamlit  # noqa: F401
+        page = args.page[0]
+        result = time_imports(page) if args.child == "imports" else time_render(page, args.url)
+        print(json.dumps(result))
+        sys.exit()
+
+    stub, url = start_stub(args.notes)
+    try:
+        print(f"{args.notes} notes, median of {args.repeat} fresh interpreters")
+        print(f"{'page':<38} {'imports ms':>10} {'first render ms':>15} {'rerun ms':>9}  heavy modules")
+        for page in args.page or PAGES:
+            imports = [measure(page, "imports", url)['imports_s'] for _ in range(args.repeat)]
+            renders = [measure(page, "render", url) for _ in range(args.repeat)]
+            first = statistics.median(r['first_render_s'] for r in renders)
+            rerun = statistics.median(r['rerun_s'] for r in renders)
+            name = os.path.splitext(os.path.basename(page))[0]
+            print(f"{name:<38} {statistics.median(imports) * 1000:>10.1f} {first * 1000:>15.1f} "
+                  f"{rerun * 1000:>9.1f}  {', '.join(renders[-1]['heavy']) or '-'}")
+    finally:
+        stub.terminate()
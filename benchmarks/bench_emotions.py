@@ -0,0 +1,91 @@
+"""
+Normalization throughput of emotion labels: the legacy per-call mapping vs the taxonomy.
+
+    python -m benchmarks.bench_emotions [--labels 1000000]
+
+Labels are drawn from the spellings the API and pages produce (lower case,
+capitalized, emoji-prefixed, display labels) plus some unknown ones.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.taxonomy import EMOTIONS, canonical_emotion, emotion_categorical, emotion_codes, standardize_labels
+
+SPELLINGS = ['sadness', 'joy', 'love', 'anger', 'fear', 'surprise', 'Sadness', 'Joy', 'Fear', 'happy', 'sad',
+             '🥲 Sad', '😃 Joy', '😡 Anger', '😍 Love', '😯 Surprise', 'Disgust 🤮', 'neutral', 'calm', 'bored']
+
+
+def legacy_standardize(emotion):
+    """The original standardize_emotion_label, which rebuilt its mapping on every call."""
+    # Define the mapping dictionary
+    emotion_mapping = {
+        'sad': 'Sadness',
+        'sadness': 'Sadness',
+        'Sad': 'Sadness',
+        'Sadness': 'Sadness',
+        '🥲 Sad': 'Sadness',
+        'anger': 'Anger',
+        'angry': 'Anger',
+        '😡 Anger': 'Anger',
+        'mad': 'Anger',
+        'rage': 'Anger',
+        'fear': 'Fear',
+        'afraid': 'Fear',
+        'scared': 'Fear',
+        '😱 Fear': 'Fear',
+        'love': 'Love',
+        '😍 Love': 'Love',
+        'affection': 'Love',
+        'joy': 'Joy',
+        'happy': 'Joy',
+        '😃 Joy': 'Joy',
+        'happiness': 'Joy',
+        'surprise': 'Surprise',
+        'shocked': 'Surprise',
+        '😯 Surprise': 'Surprise',
+        'disgust': 'Disgust',
+        'disgusted': 'Disgust',
+        '🤢 Disgust': 'Disgust',
+        'neutral': 'Neutral',
+        'calm': 'Neutral',
+        '😐 Neutral': 'Neutral'
+    }
+    
+    # Convert the input emotion to lowercase and find the standardized label
+    standardized_emotion = emotion_mapping.get(emotion.lower(), emotion)
+    return standardized_emotion
+
+
+def timed(name, func, labels, repeat=3):
+    best = min(_time(func, labels) for _ in range(repeat))
+    print(f"{name:<34} {1000 * best:>9.1f} ms {len(labels) / best / 1e6:>9.2f} M labels/s")
+
+
+def _time(func, labels):
+    start = time.perf_counter()
+    func(labels)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    labels = np.array(SPELLINGS, dtype=object)[rng.integers(0, len(SPELLINGS), args.labels)]
+    series = pd.Series(labels)
+
+    legacy = [legacy_standardize(label) for label in SPELLINGS]
+    print("legacy misses:", [label for label, std in zip(SPELLINGS, legacy) if std not in EMOTIONS and label != 'bored'])
+    print("taxonomy misses:", [label for label in SPELLINGS if canonical_emotion(label) is None and label != 'bored'])
+    print(f"{args.labels:,} labels")
+    timed("legacy, per label", lambda ls: [legacy_standardize(label) for label in ls], labels, repeat=1)
+    timed("canonical_emotion, per label", lambda ls: [canonical_emotion(label) for label in ls], labels)
+    timed("standardize_labels (names)", standardize_labels, labels)
+    timed("emotion_codes (NumPy int8)", emotion_codes, labels)
+    timed("emotion_codes (pd.Series)", emotion_codes, series)
+    timed("emotion_categorical", emotion_categorical, series)
@@ -0,0 +1,108 @@
+"""
+Replay a recorded MJPEG stream through the legacy accumulator and MjpegDemuxer.
+
+    python -m benchmarks.bench_mjpeg [--stream feed.mjpeg] [--boundary frame]
+
+Record a stream with `curl -s $API__URL/video_feed -o feed.mjpeg`; without
+--stream a synthetic 640x480 recording is generated.
+
+Also compares the per-frame CPU cost of the two webcam display modes, using
+the same image pipeline st.image runs before a frame is sent to the browser.
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+from streamlit.elements.image import image_to_url
+
+from utils.mjpeg import MjpegDemuxer, iter_frames
+
+
+def synthetic_stream(frames=300, boundary="frame"):
+    # Smooth gradients with noise compress like a real webcam image
+    y, x = np.mgrid[0:480, 0:640]
+    rng = np.random.default_rng(0)
+    base = np.dstack([x * 255 // 640, y * 255 // 480, (x + y) * 255 // 1120]).astype(np.uint8)
+    base = cv2.add(base, rng.integers(0, 24, base.shape, dtype=np.uint8))
+    parts = []
+    for i in range(frames):
+        ok, jpg = cv2.imencode('.jpg', np.roll(base, i * 4, axis=1))
+        parts.append(f'--{boundary}\r\nContent-Type: image/jpeg\r\n\r\n'.encode() + jpg.tobytes() + b'\r\n')
+    return b''.join(parts)
+
+
+def legacy_parse(chunks):
+    """The original byte_accumulator loop from stream_video_feed, instrumented."""
+    frames = copied = 0
+    byte_accumulator = b''
+    for chunk in chunks:
+        byte_accumulator += chunk
+        copied += len(byte_accumulator)
+        start = byte_accumulator.find(b'\xff\xd8')
+        end = byte_accumulator.find(b'\xff\xd9')
+        if start != -1 and end != -1:
+            jpg_data = byte_accumulator[start:end + 2]
+            byte_accumulator = byte_accumulator[end + 2:]
+            copied += len(jpg_data) + len(byte_accumulator)
+            frames += 1
+    return frames, copied
+
+
+def demuxer_parse(chunks, boundary):
+    demuxer = MjpegDemuxer(boundary)
+    for chunk in chunks:
+        demuxer.feed(chunk)
+    return demuxer.frames, demuxer.bytes_copied
+
+
+def render_decoded(jpg_data):
+    frame = cv2.imdecode(np.frombuffer(jpg_data, np.uint8), cv2.IMREAD_COLOR)
+    frame_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    image_to_url(frame_pil, -2, False, "RGB", "auto", "frame")
+
+
+def render_passthrough(jpg_data):
+    image_to_url(jpg_data, -2, False, "RGB", "JPEG", "frame")
+
+
+def run_render(name, render, frames):
+    start = time.process_time()
+    for jpg_data in frames:
+        render(jpg_data)
+    cpu = (time.process_time() - start) / len(frames)
+    print(f"{name:>12}: {cpu * 1000:8.2f} ms CPU per frame")
+
+
+def run(name, parse, chunks, total_bytes):
+    start = time.perf_counter()
+    frames, copied = parse(chunks)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {frames:6d} frames  {frames / elapsed:10.1f} frames/s  "
+          f"{copied / total_bytes:8.2f}x bytes copied ({copied >> 20} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stream", help="Recorded multipart MJPEG stream to replay")
+    parser.add_argument("--boundary", default="frame")
+    parser.add_argument("--chunk-size", type=int, nargs='+', default=[1024, 16 * 1024])
+    args = parser.parse_args()
+
+    if args.stream:
+        with open(args.stream, 'rb') as f:
+            data = f.read()
+    else:
+        data = synthetic_stream(boundary=args.boundary)
+
+    for chunk_size in args.chunk_size:
+        chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+        print(f"{len(data) >> 20} MB stream, {chunk_size} byte chunks")
+        run("legacy", legacy_parse, chunks, len(data))
+        run("demuxer", lambda c: demuxer_parse(c, args.boundary), chunks, len(data))
+
+    frames = list(iter_frames([data], args.boundary))[:100]
+    print(f"Rendering {len(frames)} frames")
+    run_render("decoded", render_decoded, frames)
+    run_render("passthrough", render_passthrough, frames)
@@ -0,0 +1,82 @@
+"""
+Rerun time per interaction on the Type-your-thoughts page.
+
+    python -m benchmarks.bench_page_reruns [--notes 2000] [--repeat 5] [--url API]
+
+Signs in a user with `--notes` diary notes through `AppTest` and performs
+each interaction `--repeat` times. Before the page was split into fragments,
+every interaction reran the whole script, so "whole page" is what it cost.
+Now only the fragment owning the widget reruns; its time is read from the
+page's own rerun timings. `AppTest` always reruns the whole script, so the
+fragment is timed as it runs inside it.
+"""
+import argparse
+import os
+import statistics
+
+import stub_api
+from streamlit.testing.v1 import AppTest
+
+from utils.reruns import WHOLE_PAGE
+
+PAGE = "pages/1_📘_Type_your_thoughts.py"
+
+
+def sign_in(email, password):
+    at = AppTest.from_file("Home.py", default_timeout=120)
+    at.run()
+    at.switch_page("pages/Sign In.py")
+    at.run()
+    at.text_input[0].input(email)
+    at.text_input[1].input(password)
+    at.button[0].click().run()
+    at.switch_page(PAGE)
+    at.run()
+    return at
+
+
+def interactions(at):
+    """(name, fragment, perform) for each interaction; `perform(i)` sets the widget for the i-th repeat."""
+    models = at.selectbox[0].options
+    windows = at.radio[0].options
+    return [
+        ("switch model", "Editor", lambda i: at.selectbox[0].set_value(models[(i + 1) % len(models)])),
+        ("change chart window", "Chart", lambda i: at.radio[0].set_value(windows[i % len(windows)])),
+        ("load more notes", "Diary", lambda i: next(b for b in at.button if b.label == "Load more").click()),
+        ("toggle augmentation", "Data augmentation", lambda i: at.toggle[0].set_value(i % 2 == 0)),
+    ]
+
+
+def measure(at, perform, fragment, repeat):
+    timings = at.session_state['rerun_timings_type_your_thoughts']
+    whole, part = [], []
+    for i in range(repeat):
+        perform(i)
+        at.run()
+        assert not at.exception, at.exception
+        stats = timings.stats()
+        whole.append(stats[(WHOLE_PAGE, False)]['last_s'])
+        part.append(stats[(fragment, False)]['last_s'])
+    return statistics.median(whole), statistics.median(part)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", help="API to benchmark against instead of the local stub")
+    args = parser.parse_args()
+
+    if args.url:
+        os.environ['API__URL'] = args.url
+    else:
+        server = stub_api.serve()
+        server.RequestHandlerClass.state.seed_user("bench@example.com", "bench", notes=args.notes)
+        os.environ['API__URL'] = stub_api.base_url(server)
+
+    at = sign_in("bench@example.com", "bench")
+    print(f"{args.notes} notes, median of {args.repeat} interactions")
+    print(f"{'interaction':<22} {'fragment':<18} {'whole page ms':>14} {'fragment ms':>12} {'speedup':>8}")
+    for name, fragment, perform in interactions(at):
+        whole, part = measure(at, perform, fragment, args.repeat)
+        print(f"{name:<22} {fragment:<18} {whole * 1000:>14.1f} {part * 1000:>12.1f} {whole / part:>7.1f}x")
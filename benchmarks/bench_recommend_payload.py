@@ -0,0 +1,72 @@
+"""
+Compare bytes sent to `/recommend`: the whole user record vs the profile digest.
+
+    python -m benchmarks.bench_recommend_payload [--notes 2000] [--calls 20] [--url API]
+
+Runs `--calls` recommendations for a user with `--notes` diary notes, once
+posting the user record as JSON on every call (the old behaviour) and once
+with the content-addressed profile, which uploads it gzip-compressed once and
+then sends only its digest. Bytes are request line, headers and body.
+"""
+import argparse
+import time
+
+import stub_api
+from utils.api_client import ApiClient
+from utils.recommendations import ProfileRegistry
+
+EMOTIONS = ['Joy', 'Sadness', 'Anger', 'Fear', 'Love', 'Surprise']
+
+
+def counting_client(url):
+    client = ApiClient(url)
+    client.bytes_sent = 0
+
+    def count(response, *args, **kwargs):
+        request = response.request
+        head = f"{request.method} {request.path_url} HTTP/1.1\r\n" + \
+            "".join(f"{k}: {v}\r\n" for k, v in request.headers.items()) + "\r\n"
+        client.bytes_sent += len(head) + len(request.body or b'')
+    client.session.hooks['response'].append(count)
+    return client
+
+
+def demo_user(notes):
+    user = {'email': "demo@example.com", 'name': "Demo User", 'age': 29, 'sex': "Other", 'location': "Lisbon",
+            'relationship_status': "Single", 'designation': "Engineer", 'salary': 50000,
+            'likes': "hiking, jazz, cooking", 'dislikes': "crowds", 'strengths': "curious", 'weaknesses': "impatient"}
+    user['notes'] = [{'id': i, 'text': f"Demo note number {i} about my day", 'emotion': EMOTIONS[i % 6].lower(),
+                      'date_created': "2024-01-01T00:00:00", 'version': i + 1} for i in range(notes)]
+    user['notes_version'] = notes
+    return user
+
+
+def full_record(client, user, emotion):
+    response = client.post("/recommend", json=user, params={'emotion': emotion})
+    response.raise_for_status()
+    return response.json()
+
+
+def run(name, recommend, url, user, calls):
+    client = counting_client(url)
+    start = time.perf_counter()
+    results = [recommend(client, user, EMOTIONS[i % len(EMOTIONS)]) for i in range(calls)]
+    elapsed = time.perf_counter() - start
+    print(f"{name:<18} {client.bytes_sent:>12,} {client.bytes_sent / calls:>12,.0f} {1000 * elapsed / calls:>10.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--url", help="API to benchmark against instead of the local stub")
+    args = parser.parse_args()
+
+    url = args.url or stub_api.base_url(stub_api.serve())
+    user = demo_user(args.notes)
+    print(f"{args.calls} calls, {args.notes} notes")
+    print(f"{'mode':<18} {'bytes sent':>12} {'per call':>12} {'ms/call':>10}")
+    baseline = run("full record", full_record, url, user, args.calls)
+    digest = run("profile digest", ProfileRegistry().recommend, url, user, args.calls)
+    print("same recommendations:", baseline == digest)
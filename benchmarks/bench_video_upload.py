@@ -0,0 +1,144 @@
+"""
+Compare video upload modes: bytes sent, end-to-end latency and agreement.
+
+    python -m benchmarks.bench_video_upload [--video clip.mp4 ...] [--uplink-mbps 10] [--url API]
+
+Without --video a synthetic clip with a drawn face (which the Haar cascade
+detects) is generated. Loopback transfers are nearly free, so the latency is
+also modeled for the given uplink bandwidth: local time + bytes / bandwidth.
+
+Without --url the local stub API is used, which always answers the same
+label; pass the real API to measure how often each sampled mode agrees with
+the whole-video result. "max gap" is the longest stretch of video no sent
+image came from, a label-free proxy for what sampling can miss.
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+import stub_api
+from utils.api_client import ApiClient
+from utils.video import (iter_face_crops, iter_jpegs, iter_resized, sample_frames, upload_image_batches, upload_npz,
+                         video_fps)
+
+
+def draw_face(img, cx, cy, s):
+    cv2.ellipse(img, (cx, cy), (int(s * 0.8), s), 0, 0, 360, (150, 170, 200), -1)
+    for dx in (-1, 1):
+        ex, ey = cx + dx * int(s * 0.35), cy - int(s * 0.2)
+        cv2.ellipse(img, (ex, ey), (int(s * 0.18), int(s * 0.09)), 0, 0, 360, (40, 40, 40), -1)
+        cv2.line(img, (ex - int(s * 0.2), ey - int(s * 0.22)), (ex + int(s * 0.2), ey - int(s * 0.25)), (30, 30, 30), 7)
+    cv2.ellipse(img, (cx, cy + int(s * 0.1)), (int(s * 0.08), int(s * 0.2)), 0, 0, 360, (120, 140, 170), -1)
+    cv2.ellipse(img, (cx, cy + int(s * 0.5)), (int(s * 0.3), int(s * 0.09)), 0, 0, 360, (60, 60, 120), -1)
+
+
+def synthetic_clip(path, seconds=10, fps=25):
+    rng = np.random.default_rng(0)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (640, 480))
+    for i in range(seconds * fps):
+        img = np.full((480, 640, 3), 90, np.uint8)
+        draw_face(img, 320 + int(80 * np.sin(i / 20)), 240, 110)
+        img = cv2.add(cv2.GaussianBlur(img, (7, 7), 0), rng.integers(0, 12, img.shape, dtype=np.uint8))
+        writer.write(img)
+    writer.release()
+
+
+def counting_client(url):
+    client = ApiClient(url)
+    client.bytes_sent = 0
+
+    def count(response, *args, **kwargs):
+        client.bytes_sent += len(response.request.body or b'')
+    client.session.hooks['response'].append(count)
+    return client
+
+
+def full_upload(client, path):
+    with open(path, 'rb') as f:
+        return client.post("/upload_video", files={"file": (os.path.basename(path), f, "multipart/form-data")})
+
+
+def tracked(items, seen):
+    for item in items:
+        seen.append(item[0])
+        yield item
+
+
+def frames_upload(strategy, rate=1.0):
+    def upload(client, path, seen):
+        frames = tracked(sample_frames(path, strategy, rate), seen)
+        return upload_image_batches(client, "/upload_frames", iter_jpegs(iter_resized(frames)), uuid.uuid4().hex,
+                                    field='frames')
+    return upload
+
+
+def faces_upload(strategy, rate=1.0, npz=False):
+    def upload(client, path, seen):
+        crops = tracked(iter_face_crops(sample_frames(path, strategy, rate)), seen)
+        if npz:
+            return upload_npz(client, "/upload_faces", crops, uuid.uuid4().hex)
+        return upload_image_batches(client, "/upload_faces", iter_jpegs(crops), uuid.uuid4().hex)
+    return upload
+
+
+def max_gap(indices, frame_count, fps):
+    points = [-1] + sorted(set(indices)) + [frame_count]
+    return max(b - a for a, b in zip(points, points[1:])) / fps
+
+
+MODES = [
+    ("whole video", None),
+    ("frames, every", frames_upload("every")),
+    ("frames, 2/s", frames_upload("rate", 2.0)),
+    ("frames, 0.5/s", frames_upload("rate", 0.5)),
+    ("frames, scene", frames_upload("scene")),
+    ("faces, every", faces_upload("every")),
+    ("faces, 2/s", faces_upload("rate", 2.0)),
+    ("faces, 2/s npz", faces_upload("rate", 2.0, npz=True)),
+    ("faces, scene", faces_upload("scene")),
+]
+
+
+def run(name, upload, url, path, uplink_mbps, reference=None):
+    client = counting_client(url)
+    seen = []
+    start = time.perf_counter()
+    response = full_upload(client, path) if upload is None else upload(client, path, seen)
+    elapsed = time.perf_counter() - start
+    modeled = elapsed + client.bytes_sent * 8 / (uplink_mbps * 1e6)
+
+    capture = cv2.VideoCapture(path)
+    frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+    gap = 0.0 if upload is None else max_gap(seen, frame_count, video_fps(path))
+    label = response.text if response.status_code == 200 else f"HTTP {response.status_code}"
+    agrees = "" if reference is None else ("  agrees" if label == reference else "  DIFFERS")
+    print(f"{name:>15}: {client.bytes_sent / 1024:9.1f} KB  {elapsed:6.2f} s local  {modeled:6.2f} s modeled  "
+          f"max gap {gap:5.2f} s  -> {label!r}{agrees}")
+    return label
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", nargs='*', default=[])
+    parser.add_argument("--uplink-mbps", type=float, default=10.0)
+    parser.add_argument("--url", help="API to benchmark against instead of the local stub")
+    args = parser.parse_args()
+
+    url = args.url or stub_api.base_url(stub_api.serve())
+    videos = args.video
+    if not videos:
+        videos = [os.path.join(tempfile.mkdtemp(), "synthetic.mp4")]
+        synthetic_clip(videos[0])
+
+    for path in videos:
+        print(f"{path} ({os.path.getsize(path) / 1024:.0f} KB), modeled uplink {args.uplink_mbps:g} Mbit/s")
+        reference = None
+        for name, upload in MODES:
+            label = run(name, upload, url, path, args.uplink_mbps, reference)
+            reference = reference or label
@@ -1,15 +1,27 @@
+import csv
+import time
+
 import streamlit as st
 import requests
-from dotenv import load_dotenv
-import os
-import pandas as pd
-import plotly.graph_objects as go
 
+from utils.api_client import get_client
 from utils.emotions import standardize_emotion_label, get_encouraging_sentence
+from utils.chart import chart_data
+from utils.debug import show_debug_panels
+from utils.diary import DiaryPager, fetch_local_page, fetch_remote_page, is_local_cursor, local_cursor
+from utils.fusion import record_classification
+from utils.journal import JOURNAL_TYPES, classify_batch, classify_batches, iter_batches, iter_entries
+from utils.notes_sync import get_notes_store, merge_user_update, refresh_notes
+from utils.recommendations import prefetch_recommendations, top_emotions
+from utils.reruns import WHOLE_PAGE, get_rerun_timings, timed_fragment
+from utils.session import require_user
+from utils.taxonomy import EMOTION_LABELS, TEXT_EMOTIONS, display_label
+from utils.timeline import EmotionTimeline
 
-load_dotenv()
-
-API_BASE_URL = os.getenv("API__URL")
+page_started = time.perf_counter()
+client = get_client()
+# The editor, chart, diary and augmentation panel are fragments, so their widgets rerun only their own part
+rerun_timings = get_rerun_timings('type_your_thoughts')
 
 # Set page configuration
 st.set_page_config(page_title="Type Your Thoughts", page_icon="💬", layout='wide', initial_sidebar_state="expanded")
@@ -24,20 +36,13 @@ st.sidebar.page_link('pages/3_🙂_Express_your_thoughts.py', icon='🧑')
 st.sidebar.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='🏃‍♂️')
 st.sidebar.markdown('---')
 
+# The diary needs the full profile; wait for it if sign-in is still loading it
+require_user()
+
 # Title
 st.markdown("# 💬 Type Your Thoughts")
 st.markdown("---")
 
-c1, c2 = st.columns(2)
-
-c2.image("https://st4.depositphotos.com/20596548/39820/i/450/depositphotos_398207466-stock-photo-young-man-writes-notebook-table.jpg")
-
-# Text Classification Section
-c1.markdown("### Hi, how are you doing today?")
-input_text = c1.text_area("", 
-                           height=200, 
-                           placeholder="Type or paste your text here...")
-
 # Model selection
 model_options = [
     "augmented_en", 
@@ -48,14 +53,6 @@ model_options = [
     "original_tm", 
 ]
 
-st.sidebar.markdown("## ⚙️ Extra Configurations")
-model_select = st.sidebar.selectbox("Select a different language / model", options=model_options)
-
-# Toggle button for Data Augmentation
-show_data_augmentation = st.sidebar.checkbox("Show Data Augmentation", value=False)
-
-predictions = None
-
 def get_emotion(input_text, model_select):
     try:
         # Prepare the data payload
@@ -63,8 +60,13 @@ def get_emotion(input_text, model_select):
                 "model_select": model_select,
                 'email':st.session_state['user']['email']}
         
+        # Ask only for the notes changed since the version we hold
+        notes_version = get_notes_store().version
+        if notes_version is not None:
+            data['since'] = notes_version
+        
         # Send POST request to the Flask API
-        response = requests.post(f"{API_BASE_URL}/text_classification", data=data)
+        response = client.post("/text_classification", data=data)
         
         # Handle the response
         if response.status_code == 200:
@@ -76,122 +78,264 @@ def get_emotion(input_text, model_select):
         st.error(f"An error occurred: {e}")
         return None
 
-if c1.button("Add to Diary", type="primary", use_container_width=True):
-    response = get_emotion(input_text, model_select)
+# Pick up notes added from elsewhere
+try:
+    refresh_notes(client)
+except requests.RequestException:
+    pass
+
+# Bulk import of a whole journal file
+def import_journal(journal_file, model_select):
+    """
+    Classify every entry of `journal_file` in concurrent batches, adding each batch to the diary as it lands.
+
+    Returns `(complete, summary)`; an unreadable file stops the import with the batches so far kept.
+    """
+    email = st.session_state['user']['email']
+    since = get_notes_store().version
+    progress = st.progress(0.0, text="Reading journal...")
+    imported = failed = 0
+    bad_lines = []
+    stopped = None
+    entries = iter_entries(journal_file, journal_file.name, errors=bad_lines)
+    batches = classify_batches(lambda batch: classify_batch(client, email, model_select, batch, since),
+                               iter_batches(entries))
+    try:
+        for batch, result, error in batches:
+            if error is None:
+                delta, errors = result
+                merge_user_update({'notes_delta': delta})
+                imported += len(batch) - errors
+                failed += errors
+            else:
+                failed += len(batch)
+            # The total is unknown while streaming, so show progress through the file
+            progress.progress(min(journal_file.tell() / max(journal_file.size, 1), 1.0),
+                              text=f"Imported {imported} entries" + (f", {failed} failed" if failed else ""))
+    except (ValueError, csv.Error) as e:
+        # Not UTF-8 (UnicodeDecodeError is a ValueError) or not parseable; batches already sent are kept
+        stopped = e
+    finally:
+        # Catch up with the API's notes version now that the import is done, which also picks up
+        # batches stored by the API but not merged here
+        try:
+            refresh_notes(client, force=True)
+        except requests.RequestException:
+            pass
+    failed += len(bad_lines)
+    summary = f"Imported {imported} entries" + (f", {failed} failed" if failed else "")
+    if bad_lines:
+        summary += f" (unreadable record on line{'s' if len(bad_lines) > 1 else ''} {', '.join(map(str, bad_lines[:5]))}" \
+                   + (", ..." if len(bad_lines) > 5 else "") + ")"
+    if stopped is not None:
+        summary += f". Stopped reading the journal: {stopped}"
+    return stopped is None and not failed, summary
+
+
+@timed_fragment(rerun_timings, "Editor")
+def diary_editor():
+    """Text box, classifier and journal import. A new note reruns the whole page so the chart and diary show it."""
+    # Text Classification Section
+    st.markdown("### Hi, how are you doing today?")
+    input_text = st.text_area("", 
+                              height=200, 
+                              placeholder="Type or paste your text here...")
+    model_select = st.selectbox("Select a different language / model", options=model_options)
+
+    if st.button("Add to Diary", type="primary", use_container_width=True):
+        response = get_emotion(input_text, model_select)
+        if response:
+            fusion = record_classification('text', response['confs'])
+            merge_user_update(response)
+            # Warm page 4 for the likeliest emotions while the user reads the result
+            prefetch_recommendations(client, top_emotions(response['confs']) + [fusion.top_emotion()])
+            st.session_state['text_classification'] = response
+            st.rerun()
+
+    # Shown by the run right after the classification, like before the page had fragments
+    response = st.session_state.pop('text_classification', None)
+    predictions = None
     if response:
         emotion = standardize_emotion_label(response['pred'])
         s = get_encouraging_sentence(emotion)
         st.info(s)
         st.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='👉')
-        st.session_state['text_last_clf'] = emotion
-        predictions = response['confs']
-        st.session_state['user'] = response['user_data']
-        predictions = {k: v for k, v in sorted(predictions.items(), key=lambda item: item[1], reverse=True)}
-
-# Expander for Classification Results
-with c1.expander("Classification Results", expanded=False):
-    # Display prediction results
-    if predictions:
-        max_confidence = max(predictions.values())
-        for label, confidence in predictions.items():
-            st.write(f"{label}: {confidence}%")
-            st.progress(confidence / 100)  # Progress bar for confidence
-    else:
-        for l in ["🥺 Sadness", "😃 Joy", "😍 Love", "😡 Anger", "😱 Fear", "😯 Surprise"]:
-            st.write(f"{l}: 0%")
-            st.progress(0)
-            
-# Charting Section
-st.subheader("My Emotions Chart")
+        predictions = {k: v for k, v in sorted(response['confs'].items(), key=lambda item: item[1], reverse=True)}
 
-user_notes = st.session_state['user']['notes']
-if user_notes is not None:
-    notes_data = user_notes
+    # Expander for Classification Results
+    with st.expander("Classification Results", expanded=False):
+        # Display prediction results
+        if predictions:
+            max_confidence = max(predictions.values())
+            for label, confidence in predictions.items():
+                st.write(f"{display_label(label)}: {confidence}%")
+                st.progress(confidence / 100)  # Progress bar for confidence
+        else:
+            for emotion in TEXT_EMOTIONS:
+                st.write(f"{EMOTION_LABELS[emotion]}: 0%")
+                st.progress(0)
+
+    with st.expander("Import a journal", expanded=False):
+        journal_file = st.file_uploader("CSV, JSONL or text journal", type=JOURNAL_TYPES,
+                                        help="CSV/JSONL need a 'text' column/key and may have a 'date' one; "
+                                             "text files hold one entry per paragraph")
+        if st.button("Import", use_container_width=True, disabled=journal_file is None):
+            st.session_state['journal_import_summary'] = import_journal(journal_file, model_select)
+            st.rerun()
+        complete, summary = st.session_state.pop('journal_import_summary', (True, None))
+        if summary:
+            (st.success if complete else st.warning)(summary)
+
+
+c1, c2 = st.columns(2)
+
+c2.image("https://st4.depositphotos.com/20596548/39820/i/450/depositphotos_398207466-stock-photo-young-man-writes-notebook-table.jpg")
+
+with c1:
+    diary_editor()
+
+chart_windows = {"Last 30 days": 30, "Last 6 months": 182, "Last year": 365, "All time": None}
+
+
+def build_emotion_figure(kind, data):
+    """Build the emotions-over-time figure for the data chosen by the chart engine."""
+    import plotly.graph_objects as go
+
+    # Create a Plotly figure
+    fig = go.Figure()
     
-    if notes_data:
-        # Convert notes to a DataFrame for easy plotting
-        df = pd.DataFrame(notes_data)
-        df['emotion'] = df['emotion'].apply(standardize_emotion_label)
-        df['date_created'] = pd.to_datetime(df['date_created'])
-        df = df.sort_values(by='date_created')
-        
-        emotion_mapping = {
-            'Anger': 'Anger 😡',
-            'Fear': 'Fear 😱',
-            'Sadness': 'Sadness 🥺',
-            'Joy': 'Joy 😃',
-            'Love': 'Love 😍',
-            'Surprise': 'Surprise 😯',
-            'Disgust': 'Disgust 🤮'
-        }
-        df['emotion_label'] = df['emotion'].map(emotion_mapping)
-        print(df)
-        # Create a Plotly figure
-        fig = go.Figure()
-        
+    if kind == 'points':
         # Add a line plot for emotions over time
         fig.add_trace(go.Scatter(
-            x=df['date_created'],
-            y=df['emotion_label'],
+            x=data['date_created'],
+            y=data['emotion_label'],
             mode='lines+markers',
             line=dict(width=4, color='violet'),
             marker=dict(size=20, color='violet'),
             name='Emotions',
-            text=df['emotion'],
+            text=data['emotion'],
             hoverinfo='text'
         ))
         
-        fig.update_yaxes(categoryorder='array', categoryarray=list(emotion_mapping.values()),
+        fig.update_yaxes(categoryorder='array', categoryarray=list(EMOTION_LABELS.values()),
                          tickfont=dict(size=20))
-        
-        # Update layout for dark theme
-        fig.update_layout(
-            # title='Emotions Over Time',
-            # title_font=dict(size=16, color='white'),
-            xaxis_title='Date',
-            xaxis_title_font=dict(size=12, color='white'),
-            yaxis_title='Emotion',
-            yaxis_title_font=dict(size=12, color='white'),
-            paper_bgcolor='#222222',
-            plot_bgcolor='#222222',
-            font=dict(color='white'),
-            xaxis=dict(showgrid=True, gridcolor='dimgrey'),
-            yaxis=dict(showgrid=True, gridcolor='dimgrey')
-        )
-
-        # Show plot in Streamlit
-        st.plotly_chart(fig, use_container_width=True)
+        yaxis_title = 'Emotion'
     else:
-        st.info("No journals found. Start writing your first journal 📔")
+        # Stacked share of each emotion per day/week/month
+        period, counts = data
+        for label in counts.columns:
+            fig.add_trace(go.Scatter(
+                x=counts.index,
+                y=counts[label],
+                mode='lines',
+                line=dict(width=0.5),
+                stackgroup='emotions',
+                groupnorm='percent',
+                name=label
+            ))
+        yaxis_title = f'{period} emotions (%)'
+    
+    # Update layout for dark theme
+    fig.update_layout(
+        # title='Emotions Over Time',
+        # title_font=dict(size=16, color='white'),
+        xaxis_title='Date',
+        xaxis_title_font=dict(size=12, color='white'),
+        yaxis_title=yaxis_title,
+        yaxis_title_font=dict(size=12, color='white'),
+        paper_bgcolor='#222222',
+        plot_bgcolor='#222222',
+        font=dict(color='white'),
+        xaxis=dict(showgrid=True, gridcolor='dimgrey'),
+        yaxis=dict(showgrid=True, gridcolor='dimgrey')
+    )
+    return fig
 
-# Display Notes Below the Graph
-st.subheader("My Diary")
 
-if user_notes is not None:
-    notes_data = user_notes
-    
-    if notes_data:
-        # Sort notes by date created (optional: latest first)
-        notes_data = sorted(notes_data, key=lambda x: x['date_created'], reverse=True)
-        
-        for note in notes_data:
-            # Extract details
-            note_text = note.get('text', 'No text')
-            date_created = pd.to_datetime(note.get('date_created')).strftime('%Y-%m-%d %H:%M')
-            emotion = standardize_emotion_label(note.get('emotion'))
-            
-            # Display each note in an expander
-            with st.expander(f"{date_created}", expanded=False):
-                st.markdown(f"##### {note_text}")
-                st.markdown(f"**Emotion Detected**: {emotion_mapping[emotion]}")
-                
-    else:
+@timed_fragment(rerun_timings, "Chart")
+def emotions_chart(timeline, user_notes):
+    # Charting Section
+    st.subheader("My Emotions Chart")
+
+    if user_notes is not None:
+        notes_data = user_notes
+
+        if notes_data:
+            chart_window = st.radio("Show", options=list(chart_windows), index=len(chart_windows) - 1,
+                                    horizontal=True, label_visibility="collapsed")
+
+            figure_key = (id(timeline), timeline.version, chart_window)
+            cached = st.session_state.get('emotion_figure')
+            if cached is None or cached[0] != figure_key:
+                kind, data = chart_data(timeline.frame, chart_windows[chart_window])
+                cached = (figure_key, build_emotion_figure(kind, data))
+                st.session_state['emotion_figure'] = cached
+
+            # Show plot in Streamlit
+            st.plotly_chart(cached[1], use_container_width=True)
+        else:
+            st.info("No journals found. Start writing your first journal 📔")
+
+
+# Only new notes are parsed; the figure is rebuilt only when the timeline or window changed
+timeline = st.session_state.setdefault('emotion_timeline', EmotionTimeline())
+user_notes = st.session_state['user']['notes']
+timeline.sync(user_notes)
+
+emotions_chart(timeline, user_notes)
+
+
+def fetch_diary_page(cursor, limit):
+    """Fetch a page of notes from the API's cursor endpoint, or from the local timeline if it has none."""
+    if not st.session_state.get('diary_local') and not is_local_cursor(cursor):
+        try:
+            return fetch_remote_page(client, st.session_state['user']['email'], cursor, limit)
+        except LookupError:
+            st.session_state['diary_local'] = True
+        except requests.RequestException:
+            # Serve this page from the notes we already have
+            pass
+    if cursor is not None and not is_local_cursor(cursor):
+        # The API's keyset cursor means nothing locally; continue after the entries already shown
+        cursor = local_cursor(len(st.session_state['diary_pager'][1].entries))
+    return fetch_local_page(timeline, cursor, limit)
+
+
+@timed_fragment(rerun_timings, "Diary")
+def diary(timeline):
+    # Display Notes Below the Graph
+    st.subheader("My Diary")
+
+    # Start from the first page again whenever the notes changed
+    pager_version, pager = st.session_state.get('diary_pager', (None, None))
+    if pager is None or pager_version != timeline.version:
+        pager = DiaryPager(fetch_diary_page)
+        st.session_state['diary_pager'] = (timeline.version, pager)
+    if not pager.loaded:
+        pager.load_more()
+
+    for entry in pager.entries:
+        # Display each note in an expander
+        with st.expander(entry['title'], expanded=False):
+            st.markdown(f"##### {entry['text']}")
+            st.markdown(f"**Emotion Detected**: {entry['emotion']}")
+
+    if pager.loaded and not pager.entries:
         st.info("No journal entries found. Start writing your first journal 📔")
+    elif pager.has_more:
+        st.button("Load more", on_click=pager.load_more, use_container_width=True)
 
 
+diary(timeline)
+
 
 # Data Augmentation Section
-if show_data_augmentation:
+@timed_fragment(rerun_timings, "Data augmentation")
+def data_augmentation():
+    # Toggle button for Data Augmentation
+    if not st.toggle("Show Data Augmentation", value=False):
+        return
+
     st.header("Data Augmentation")
     col1, col2 = st.columns(2)
 
@@ -231,3 +375,14 @@ if show_data_augmentation:
                     st.success(s)
                 else:
                     st.error(s)
+
+
+data_augmentation()
+
+# Rendered last so the numbers include this run
+rerun_timings.record(WHOLE_PAGE, time.perf_counter() - page_started)
+if show_debug_panels():
+    with st.sidebar.expander("Rerun timings"):
+        for (part, alone), stats in rerun_timings.stats().items():
+            st.caption(f"{part}{' alone' if alone else ''}: {stats['last_s'] * 1000:.0f} ms last, "
+                       f"{stats['mean_s'] * 1000:.0f} ms mean over {stats['runs']} runs")
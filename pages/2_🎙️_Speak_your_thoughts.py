@@ -1,13 +1,16 @@
 import streamlit as st
-import requests
-from dotenv import load_dotenv
-import os
 
-from utils.emotions import get_encouraging_sentence, standardize_emotion_label
+from utils.api_client import get_client
+from utils.audio import (AUDIO_SAMPLE_RATE, AUDIO_WORKERS, WINDOW_SECONDS, classify_audio_files, classify_windows,
+                         load_signal, overall_emotion)
+from utils.emotions import get_encouraging_sentence
+from utils.fusion import record_classification
+from utils.recommendations import prefetch_recommendations
+from utils.result_cache import get_result_cache, result_key
+from utils.taxonomy import EMOTION_LABELS
 
 
-load_dotenv()
-API_BASE_URL = os.getenv("API__URL") 
+client = get_client()
 # Streamlit configuration
 st.set_page_config(page_title="Audio Classification", page_icon="🎧", initial_sidebar_state="expanded")
 
@@ -21,50 +24,111 @@ st.sidebar.page_link('pages/3_🙂_Express_your_thoughts.py', icon='🧑')
 st.sidebar.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='🏃‍♂️')
 st.sidebar.markdown('---')
 
-def upload_audio_file(audio_file):
-    """Uploads the audio file to the Flask API and returns the classification result."""
-    try:
-        # Ensure the temporary upload folder exists
-        upload_folder = "uploads"  # Same as your Flask app's upload folder
-        os.makedirs(upload_folder, exist_ok=True)
-
-        # Save the uploaded file to the temporary folder
-        file_path = os.path.join(upload_folder, audio_file.name)
-        with open(file_path, "wb") as f:
-            f.write(audio_file.getbuffer())
-        
-        # Send the file to the Flask backend for classification
-        with open(file_path, "rb") as f:
-            files = {"audio_file": (audio_file.name, f, "audio/wav")}
-            response = requests.post(f"{API_BASE_URL}/audio_classification", files=files)
-        
-        # Handle the response
-        if response.status_code == 200:
-            return response.text  # Get the classification result from the response
+st.sidebar.markdown("## ⚙️ Extra Configurations")
+max_parallel_uploads = st.sidebar.slider("Files classified at once", min_value=1, max_value=8, value=AUDIO_WORKERS)
+compact_audio = st.sidebar.checkbox(f"Compact WAV files before upload (mono, {AUDIO_SAMPLE_RATE // 1000} kHz, "
+                                    "silence trimmed)", value=True)
+windowed = st.sidebar.checkbox("Classify long recordings in overlapping windows", value=False)
+window_seconds = st.sidebar.slider("Window length (seconds)", min_value=1.0, max_value=10.0, value=WINDOW_SECONDS,
+                                   step=0.5, disabled=not windowed)
+
+
+def classify_audio_uploads(audio_files):
+    """Classify the uploaded files concurrently, filling a results table as each one finishes."""
+    table = st.empty()
+    progress = st.progress(0.0, text="Classifying...")
+    # Keyed by object, since two files may share a name
+    rows = {id(audio_file): {'File': audio_file.name, 'Emotion': "", 'Status': "Waiting", 'Seconds': None}
+            for audio_file in audio_files}
+    emotions = []
+    table.dataframe(list(rows.values()), use_container_width=True, hide_index=True)
+    for done, (audio_file, emotion, error, seconds) in enumerate(
+            classify_audio_files(client, audio_files, max_parallel_uploads, compact_audio,
+                                 get_result_cache()), start=1):
+        if error is None:
+            rows[id(audio_file)].update(Emotion=emotion, Status="Done", Seconds=round(seconds, 2))
+            emotions.append(emotion)
         else:
-            st.error("Error in classification. Please try again.")
-            return None
-    except Exception as e:
-        st.error(f"An error occurred: {e}")
-        return None
+            rows[id(audio_file)].update(Status=f"Failed: {error}", Seconds=round(seconds, 2))
+        table.dataframe(list(rows.values()), use_container_width=True, hide_index=True)
+        progress.progress(done / len(audio_files), text=f"Classified {done} of {len(audio_files)}")
+    progress.empty()
+    return emotions
+
+
+def build_window_timeline(windows):
+    """Plot each classified window as a segment at its emotion's height."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for start, end, emotion in windows:
+        fig.add_trace(go.Scatter(x=[start, end], y=[EMOTION_LABELS.get(emotion, emotion)] * 2, mode='lines+markers',
+                                 line=dict(width=8, color='violet'), showlegend=False,
+                                 hovertext=f"{start:.1f}-{end:.1f} s: {emotion}", hoverinfo='text'))
+    fig.update_yaxes(categoryorder='array', categoryarray=list(EMOTION_LABELS.values()))
+    fig.update_layout(xaxis_title='Seconds', yaxis_title='Emotion', height=320, margin=dict(t=20, b=20),
+                      paper_bgcolor='#222222', plot_bgcolor='#222222', font=dict(color='white'))
+    return fig
+
+
+def classify_audio_windows(audio_file):
+    """Classify a recording window by window, drawing its emotion timeline as the windows finish."""
+    cache = get_result_cache()
+    key = result_key(audio_file.getvalue(), 'audio', f'windows-{window_seconds}-{AUDIO_SAMPLE_RATE}hz')
+    windows, failed = cache.get(key), 0
+    if windows is None:
+        signal = load_signal(audio_file.getvalue(), trim=False)
+        if signal is None:
+            st.warning(f"{audio_file.name} can't be split locally, so it is classified as a whole.")
+            return next(iter(classify_audio_uploads([audio_file])), None)
+
+    st.markdown(f"##### {audio_file.name}")
+    chart = st.empty()
+    status = st.empty()
+    if windows is None:
+        windows = []
+        for start, end, emotion, error in classify_windows(client, audio_file.name, signal, AUDIO_SAMPLE_RATE,
+                                                           max_parallel_uploads, window_seconds, window_seconds / 2):
+            if error is None:
+                windows.append((start, end, emotion))
+                chart.plotly_chart(build_window_timeline(windows), use_container_width=True)
+            else:
+                failed += 1
+            status.caption(f"{len(windows)} windows classified" + (f", {failed} failed" if failed else ""))
+        if windows and not failed:
+            cache.put(key, sorted(windows))
+    else:
+        chart.plotly_chart(build_window_timeline(windows), use_container_width=True)
+    overall = overall_emotion([emotion for _, _, emotion in windows])
+    if overall:
+        status.caption(f"Overall: {EMOTION_LABELS.get(overall, overall)} across {len(windows)} windows"
+                       + (f" ({failed} failed)" if failed else ""))
+    return overall
+
 
 # Streamlit UI
 st.title("🎧 Speak your Thoughts")
-st.markdown("Upload an audio file to detect emotions.")
+st.markdown("Upload one or more audio files to detect emotions.")
 
 # Audio file uploader
-audio_file = st.file_uploader("Choose an audio file", type=["wav", "mp3"], label_visibility="collapsed")
+audio_files = st.file_uploader("Choose audio files", type=["wav", "mp3"], accept_multiple_files=True,
+                               label_visibility="collapsed")
 
 # Button to trigger audio classification
-if st.button("Classify Audio") and audio_file:
-    with st.spinner("Classifying..."):
-        classification_result = upload_audio_file(audio_file)
+if st.button("Classify Audio") and audio_files:
+    if windowed:
+        emotions = [emotion for emotion in map(classify_audio_windows, audio_files) if emotion]
+    else:
+        emotions = classify_audio_uploads(audio_files)
 
-    if classification_result:
-        classification_result = standardize_emotion_label(classification_result)
+    if emotions:
+        # Every file counts towards the session's audio emotion
+        for emotion in emotions:
+            fusion = record_classification('audio', emotion)
+        classification_result = emotions[0] if len(emotions) == 1 else fusion.top_emotion()
         s = get_encouraging_sentence(classification_result)
         st.info(s)
         st.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='👉')
-        # st.success(f"{classification_result}")
-        st.session_state['audio_last_clf'] = classification_result
-
+        prefetch_recommendations(client, [classification_result, fusion.top_emotion()])
+    else:
+        st.error("Error in classification. Please try again.")
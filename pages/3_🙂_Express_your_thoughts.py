@@ -1,15 +1,21 @@
 import streamlit as st
 import requests
-import cv2
-import numpy as np
-from PIL import Image
-import os
-from pathlib import Path
+import time
+import uuid
 
+from utils.api_client import get_client
 from utils.emotions import get_encouraging_sentence, standardize_emotion_label
+from utils.fusion import record_classification
+from utils.mjpeg import FramePacer
+from utils.recommendations import prefetch_recommendations
+from utils.webcam import FeedReader
+from utils.result_cache import get_result_cache, result_key
+from utils.spool import get_spool
+from utils.uploads import post_file, upload_chunked
 
 # Set up your API base URL
 API_BASE_URL = "http://localhost:5000"  # Change this if your Flask app is hosted elsewhere
+client = get_client(API_BASE_URL)
 st.set_page_config(page_title="Emotion Detection", page_icon="🎭", initial_sidebar_state="expanded")
 
 
@@ -22,55 +28,82 @@ st.sidebar.page_link('pages/3_🙂_Express_your_thoughts.py', icon='🧑')
 st.sidebar.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='🏃‍♂️')
 st.sidebar.markdown('---')
 
-# Set up temporary directory for video uploads
-TEMP_DIR = Path("temp_videos")
-TEMP_DIR.mkdir(exist_ok=True)
+# Webcam display settings
+st.sidebar.markdown("## ⚙️ Extra Configurations")
+passthrough_display = st.sidebar.checkbox("Display original webcam frames (faster)", value=True)
+max_webcam_fps = st.sidebar.slider("Max webcam frame rate", min_value=1, max_value=30, value=15)
 
-# Streamlit configuration
 
+def start_webcam():
+    """Start consuming the Flask `/video_feed` stream on a background reader for this session."""
+    stop_feed_reader()
+    st.session_state['webcam_reader'] = FeedReader(client, "/video_feed").start()
+    st.session_state['webcam_pacer'] = FramePacer(max_webcam_fps)
 
-def stream_video_feed():
-    """Stream the video feed from the Flask API and display it on Streamlit."""
-    video_container = st.empty()  # Create a placeholder for the video feed
-    
-    try:
-        # Send a GET request to the Flask `/video_feed` endpoint
-        response = requests.get(f"{API_BASE_URL}/video_feed", stream=True)
-
-        # Initialize a byte accumulator
-        byte_accumulator = b''
-
-        # Read the stream from the response
-        for chunk in response.iter_content(chunk_size=1024):
-            byte_accumulator += chunk
-
-            # Detect frame boundary (end of the image data)
-            start = byte_accumulator.find(b'\xff\xd8')  # JPEG start
-            end = byte_accumulator.find(b'\xff\xd9')  # JPEG end
-
-            if start != -1 and end != -1:
-                # Extract a complete JPEG frame
-                jpg_data = byte_accumulator[start:end + 2]
-                byte_accumulator = byte_accumulator[end + 2:]  # Remove processed frame
-
-                # Convert to a NumPy array and decode
-                frame = cv2.imdecode(np.frombuffer(jpg_data, np.uint8), cv2.IMREAD_COLOR)
-
-                if frame is not None:
-                    # Convert BGR to RGB
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    # Convert to PIL image
-                    frame_pil = Image.fromarray(frame_rgb)
-                    # Display in Streamlit
-                    video_container.image(frame_pil, use_column_width=True)
-    except requests.RequestException as e:
-        st.error(f"Failed to connect to the webcam feed: {e}")
+
+def stop_feed_reader():
+    """Stop this session's feed reader, if any."""
+    reader = st.session_state.pop('webcam_reader', None)
+    if reader is not None:
+        reader.stop()
+
+
+def render_frame(jpg_data, passthrough=True):
+    """Display one JPEG frame from the webcam feed."""
+    if passthrough:
+        # Forward the original JPEG bytes to the browser without decoding them
+        st.image(jpg_data, output_format="JPEG", use_column_width=True)
+        return
+
+    # Loaded only once decoded frames are shown, so the page itself starts without OpenCV
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    # Convert to a NumPy array and decode
+    frame = cv2.imdecode(np.frombuffer(jpg_data, np.uint8), cv2.IMREAD_COLOR)
+    if frame is not None:
+        # Convert BGR to RGB
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Convert to PIL image
+        frame_pil = Image.fromarray(frame_rgb)
+        # Display in Streamlit
+        st.image(frame_pil, use_column_width=True)
+
+
+@st.experimental_fragment(run_every=1 / max_webcam_fps)
+def webcam_view():
+    """Periodically show the newest frame of the feed; only this fragment reruns."""
+    reader = st.session_state.get('webcam_reader')
+    if reader is None:
+        return
+    if not reader.running:
+        stop_feed_reader()
+        if reader.error:
+            st.error(f"Failed to connect to the webcam feed: {reader.error}")
+        return
+
+    seq, jpg_data = reader.latest()
+    pacer = st.session_state['webcam_pacer']
+    pacer.set_max_fps(max_webcam_fps)
+    started = time.perf_counter()
+
+    # Re-show the current frame when there is nothing new or the pacer says wait
+    fresh = seq != st.session_state.get('webcam_seq') and pacer.ready(started)
+    if fresh:
+        st.session_state['webcam_seq'] = seq
+        st.session_state['webcam_frame'] = jpg_data
+    if st.session_state.get('webcam_frame') is not None:
+        render_frame(st.session_state['webcam_frame'], passthrough_display)
+        if fresh:
+            pacer.rendered(started, time.perf_counter() - started)
 
 
 def stop_webcam():
     """Send a request to stop the webcam and display the generalized emotion result."""
+    stop_feed_reader()
     try:
-        response = requests.post(f"{API_BASE_URL}/stop")
+        response = client.post("/stop")
         if response.status_code == 200:
             emotion = standardize_emotion_label(response.text)
             s = get_encouraging_sentence(emotion)
@@ -78,47 +111,106 @@ def stop_webcam():
             st.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='👉')
             
             # st.success(f"**Generalized Emotion Detected:** {emotion}")
-            st.session_state['video_last_clf'] = emotion
+            fusion = record_classification('video', emotion)
+            prefetch_recommendations(client, [emotion, fusion.top_emotion()])
         else:
             st.error("Failed to stop the webcam or retrieve emotion data.")
     except requests.RequestException as e:
         st.error(f"Failed to send stop request: {e}")
 
 
-def save_uploaded_file(uploaded_file):
-    """Save the uploaded file to a temporary directory."""
-    temp_file_path = TEMP_DIR / uploaded_file.name
-    with open(temp_file_path, "wb") as f:
-        f.write(uploaded_file.read())
-    return temp_file_path
+def show_video_emotion(generalized_emotion):
+    """Display the generalized emotion detected in an uploaded video."""
+    s = get_encouraging_sentence(generalized_emotion)
+    st.info(s)
+    st.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='👉')
+
+    # st.success(f"**Generalized Emotion Detected:** {generalized_emotion}")
+    fusion = record_classification('video', generalized_emotion)
+    prefetch_recommendations(client, [generalized_emotion, fusion.top_emotion()])
+
+
+def video_emotion(response):
+    """The generalized emotion from a video upload response, or None after reporting the failure."""
+    if response is None:
+        return None
+    if response.status_code != 200:
+        st.error("Failed to process the video. Please try again.")
+        return None
+    return standardize_emotion_label(response.text)
 
 
 def upload_and_detect_emotion(uploaded_file):
     """Upload the video file to the server for emotion detection."""
-    temp_file_path = save_uploaded_file(uploaded_file)
-
     try:
-        # Send the file to the Flask backend
-        with open(temp_file_path, "rb") as f:
-            files = {"file": (uploaded_file.name, f, "multipart/form-data")}
-            response = requests.post(f"{API_BASE_URL}/upload_video", files=files)
+        # Stream the in-memory upload straight to the Flask backend
+        return post_file(client, "/upload_video", "file", uploaded_file.name, uploaded_file.getvalue(),
+                         "multipart/form-data")
+    except requests.RequestException as e:
+        st.error(f"Failed to upload the video: {e}")
+
+
+def upload_and_detect_emotion_chunked(uploaded_file):
+    """Upload the video in resumable chunks straight from memory, with a progress bar."""
+    # Keep the upload id per file so clicking again after a failure resumes the upload
+    upload_ids = st.session_state.setdefault('video_upload_ids', {})
+    upload_id = upload_ids.setdefault(uploaded_file.file_id, uuid.uuid4().hex)
+
+    progress = st.progress(0.0, text="Uploading...")
 
+    def on_progress(sent, total):
+        progress.progress(sent / total if total else 1.0, text=f"Uploading... {sent >> 20} / {total >> 20} MB")
+
+    try:
+        response = upload_chunked(client, "/upload_video", uploaded_file.name, uploaded_file.getvalue(),
+                                  upload_id, on_progress=on_progress)
         if response.status_code == 200:
-            # Display the generalized emotion result
-            generalized_emotion = standardize_emotion_label(response.text)
-            s = get_encouraging_sentence(generalized_emotion)
-            st.info(s)
-            st.page_link('pages/4_🏃‍♂️_Recommendations_for_you.py', icon='👉')
-            
-            # st.success(f"**Generalized Emotion Detected:** {generalized_emotion}")
-            st.session_state['video_last_clf'] = generalized_emotion
-        else:
-            st.error("Failed to process the video. Please try again.")
+            # Done; anything else keeps the id so clicking again resumes
+            upload_ids.pop(uploaded_file.file_id, None)
+        return response
+    except requests.RequestException as e:
+        st.error(f"Upload interrupted, click again to resume: {e}")
+    finally:
+        progress.empty()
+
+
+def upload_frames_and_detect_emotion(uploaded_file, faces_only, strategy, rate, npz=False):
+    """
+    Decode the video locally and send only sampled frames, or just the faces found
+    in them, in batches for emotion detection.
+    """
+    # OpenCV is loaded only when a video is actually decoded here
+    from utils.video import (iter_face_crops, iter_jpegs, iter_resized, sample_frames, upload_image_batches,
+                             upload_npz, video_file)
+
+    progress = st.progress(0.0, text="Sampling frames...")
+
+    def with_progress(frames):
+        for index, frame_count, frame in frames:
+            progress.progress(min(index / frame_count, 1.0) if frame_count > 0 else 0.0,
+                              text=f"Sampling frames... frame {index + 1}")
+            yield index, frame_count, frame
+
+    upload_id = uuid.uuid4().hex
+    try:
+        with video_file(uploaded_file, get_spool()) as path:
+            frames = with_progress(sample_frames(path, strategy, rate))
+            if not faces_only:
+                response = upload_image_batches(client, "/upload_frames", iter_jpegs(iter_resized(frames)),
+                                                upload_id, field='frames')
+            elif npz:
+                response = upload_npz(client, "/upload_faces", iter_face_crops(frames), upload_id)
+            else:
+                response = upload_image_batches(client, "/upload_faces", iter_jpegs(iter_face_crops(frames)),
+                                                upload_id)
+        if response.status_code == 422:
+            st.error("No faces were found in the video." if faces_only else "No frames could be read from the video.")
+            return None
+        return response
     except requests.RequestException as e:
         st.error(f"Failed to upload the video: {e}")
     finally:
-        # Remove the temporary file after processing
-        os.remove(temp_file_path)
+        progress.empty()
 
 
 # Streamlit UI for Webcam Emotion Detection
@@ -131,11 +223,14 @@ st.markdown("Use your webcam to detect emotions in real-time.")
 left, right = st.columns(2)
 
 if left.button("Start Webcam Detection", use_container_width=True, type='primary'):
-    stream_video_feed()
+    start_webcam()
 
 if right.button("Stop Webcam Detection", use_container_width=True):
     stop_webcam()
 
+if 'webcam_reader' in st.session_state:
+    webcam_view()
+
 st.markdown("---")
 
 # Streamlit UI for Video Upload Emotion Detection
@@ -144,8 +239,44 @@ st.markdown("Upload a video file to detect emotions.")
 
 # Video file uploader
 uploaded_file = st.file_uploader("Choose a video file", type=["mp4", "avi", "mov"], label_visibility="collapsed")
+upload_mode = st.radio("Upload mode", ["Whole video", "Resumable chunks", "Sampled frames", "Detected faces only"],
+                       horizontal=True,
+                       help="'Sampled frames' sends only a few frames per second; "
+                            "'Detected faces only' finds faces on your device and sends just the cropped faces.")
+
+sampling_options = {"Fixed rate": "rate", "Scene change": "scene", "Every frame": "every"}
+if upload_mode in ("Sampled frames", "Detected faces only"):
+    s1, s2 = st.columns(2)
+    sampling = s1.selectbox("Frame sampling", options=list(sampling_options))
+    sample_rate = s2.slider("Frames per second", min_value=0.5, max_value=10.0, value=2.0, step=0.5,
+                            disabled=sampling != "Fixed rate")
+    faces_npz = upload_mode == "Detected faces only" and st.checkbox("Send face crops as one compressed NumPy file")
 
 # Trigger video upload and processing
 if st.button("Upload and Detect Emotion") and uploaded_file:
-    with st.spinner("Processing..."):
-        upload_and_detect_emotion(uploaded_file)
+    # Whole and chunked uploads give the backend the same video; sampling modes depend on their settings
+    if upload_mode in ("Sampled frames", "Detected faces only"):
+        cache_mode = f"{upload_mode}-{sampling_options[sampling]}-{sample_rate}"
+    else:
+        cache_mode = "whole"
+    result_cache = get_result_cache()
+    cache_key = result_key(uploaded_file.getvalue(), 'video', cache_mode)
+    emotion = result_cache.get(cache_key)
+
+    if emotion is None:
+        if upload_mode == "Resumable chunks":
+            response = upload_and_detect_emotion_chunked(uploaded_file)
+        elif upload_mode in ("Sampled frames", "Detected faces only"):
+            response = upload_frames_and_detect_emotion(uploaded_file, upload_mode == "Detected faces only",
+                                                        sampling_options[sampling], sample_rate, faces_npz)
+        else:
+            with st.spinner("Processing..."):
+                response = upload_and_detect_emotion(uploaded_file)
+        emotion = video_emotion(response)
+        if emotion is not None:
+            result_cache.put(cache_key, emotion)
+    else:
+        st.caption("Seen this video before, so it was not uploaded again.")
+
+    if emotion is not None:
+        show_video_emotion(emotion)
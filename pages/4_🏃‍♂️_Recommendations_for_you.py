@@ -1,11 +1,13 @@
-import streamlit as st
 import requests
-from dotenv import load_dotenv
-import os
+import streamlit as st
 from streamlit_extras.switch_page_button import switch_page
-from utils.emotions import get_max_voted_emotion
-load_dotenv()
-API_BASE_URL = os.getenv("API__URL") 
+from utils.api_client import get_client
+from utils.debug import show_debug_panels
+from utils.fusion import get_fusion
+from utils.recommendations import fetch_recommendation, get_recommendation_cache
+from utils.session import require_user
+from utils.taxonomy import EMOTION_LABELS
+client = get_client()
 
 # Streamlit configuration
 st.set_page_config(page_title="Recommendations", page_icon="🏃‍♂️", initial_sidebar_state="expanded", layout='wide')
@@ -26,17 +28,14 @@ def get_recommendation(emotion):
     
     
     try:
-        # Prepare the data payload
-        user_data = st.session_state['user']
-        
-        # Send POST request to the Flask API
-        response = requests.post(f"{API_BASE_URL}/recommend", json=user_data, params={'emotion':emotion})
+        # Prepare the data payload, waiting for the profile if it is still loading
+        user_data = require_user()
         
-        if response.status_code == 200:
-            return response.json() 
-        else:
-            st.error("Error in fetching recommendations. Please try again.")
-            return None
+        # Served from the shared cache unless the profile or emotion changed
+        return fetch_recommendation(client, user_data, emotion)
+    except requests.HTTPError:
+        st.error("Error in fetching recommendations. Please try again.")
+        return None
     except Exception as e:
         st.error(f"An error occurred: {e}")
         return None
@@ -51,8 +50,15 @@ c1.image('https://cdn.prod.website-files.com/62693896276250215054cdda/63d3c0f755
 
 
 c2.markdown("### Get recommendations tailored for you!")
-# Emotion input
-emotion = c2.text_input("Your Emotion:", get_max_voted_emotion())
+# Emotion input, suggesting the most likely emotion across your text, audio and video
+fusion = get_fusion()
+emotion = c2.text_input("Your Emotion:", fusion.top_emotion())
+if fusion.latest:
+    with c2.expander("How you seem to feel", expanded=False):
+        for label, probability in sorted(zip(EMOTION_LABELS.values(), fusion.distribution()), key=lambda item: -item[1]):
+            if probability > 0:
+                st.write(f"{label}: {100 * probability:.1f}%")
+                st.progress(float(probability))
 
 # Button to trigger recommendation retrieval
 if c2.button("Get Recommendation", type='primary') and emotion:
@@ -68,5 +74,9 @@ if c2.button("Get Recommendation", type='primary') and emotion:
             c2.markdown(f"{description}")
         else:
             c2.warning("No recommendations found for the given emotion.")
-            
 
+# Rendered last so the counters include this run
+if show_debug_panels():
+    with st.sidebar.expander("Recommendation cache"):
+        cache_stats = get_recommendation_cache().stats()
+        st.caption(f"{cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} entries")
@@ -1,14 +1,11 @@
 import streamlit as st
-import requests
-from dotenv import load_dotenv
-import os
 from streamlit_extras.switch_page_button import switch_page 
 
-# Load environment variables
-load_dotenv()
+from utils.api_client import get_client
+from utils.session import sign_in
 
-# Retrieve the API URL from the environment variables
-FLASK_API_URL = os.getenv("API__URL")
+# Shared client for the API URL from the environment variables
+client = get_client()
 
 # Set page configuration
 st.set_page_config(page_title="MyRecommender", page_icon="😎", layout="centered")
@@ -29,12 +26,12 @@ with tab1:
 
     if submit_button:
         # Make a POST request to the Sign In endpoint
-        response = requests.post(f"{FLASK_API_URL}/signin", data={'email': email, 'password': password})
+        # Ask only for the identity; the profile and diary are loaded in the background
+        response = client.post("/signin", data={'email': email, 'password': password, 'fields': 'identity'})
         if response.status_code == 200:
             st.success("Sign in successful!")
             user = response.json()  # Assuming your Flask API returns user data in JSON format
-            st.session_state['authenticated'] = True
-            st.session_state['user'] = user['user_data']  # Store user data in session state
+            sign_in(user['user_data'], client)  # Store user data in session state
             switch_page("home")  # Redirect to the home page
         else:
             st.error("Invalid email or password.")
@@ -84,14 +81,13 @@ with tab2:
         
         # Make a POST request to the Sign Up endpoint
         try:
-            response = requests.post(f"{FLASK_API_URL}/signup", data=signup_data)
+            response = client.post("/signup", data=signup_data)
             
             # Check if the signup was successful
             if response.status_code == 200:
                 st.success("Signup successful! You are now logged in.")
                 user_data = response.json()  # Assuming your API returns user data
-                st.session_state['authenticated'] = True
-                st.session_state['user'] = user_data
+                sign_in(user_data, client)
                 switch_page("home")  
             elif response.status_code == 400:
                 st.error("Email already exists. Please use a different email.")
@@ -0,0 +1,468 @@
+"""
+Local stand-in for the MoodMate Flask API, used for development and benchmarks.
+
+Run it and point the app at it:
+
+    python stub_api.py --port 5000
+    API__URL=http://localhost:5000 streamlit run Home.py
+"""
+import argparse
+import base64
+import email.parser
+import email.policy
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import numpy as np
+
+ROUTES = {}
+
+# An 8x8 JPEG served as every webcam frame
+SAMPLE_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAgGBgcGBQgHBwcJCQgKDBQNDAsLDBkSEw8UHRofHh0a"
+    "HBwgJC4nICIsIxwcKDcpLDAxNDQ0Hyc5PTgyPC4zNDL/2wBDAQkJCQwLDBgNDRgyIRwhMjIyMjIy"
+    "MjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjL/wAARCAAIAAgDASIA"
+    "AhEBAxEB/8QAHwAAAQUBAQEBAQEAAAAAAAAAAAECAwQFBgcICQoL/8QAtRAAAgEDAwIEAwUFBAQA"
+    "AAF9AQIDAAQRBRIhMUEGE1FhByJxFDKBkaEII0KxwRVS0fAkM2JyggkKFhcYGRolJicoKSo0NTY3"
+    "ODk6Q0RFRkdISUpTVFVWV1hZWmNkZWZnaGlqc3R1dnd4eXqDhIWGh4iJipKTlJWWl5iZmqKjpKWm"
+    "p6ipqrKztLW2t7i5usLDxMXGx8jJytLT1NXW19jZ2uHi4+Tl5ufo6erx8vP09fb3+Pn6/8QAHwEA"
+    "AwEBAQEBAQEBAQAAAAAAAAECAwQFBgcICQoL/8QAtREAAgECBAQDBAcFBAQAAQJ3AAECAxEEBSEx"
+    "BhJBUQdhcRMiMoEIFEKRobHBCSMzUvAVYnLRChYkNOEl8RcYGRomJygpKjU2Nzg5OkNERUZHSElK"
+    "U1RVVldYWVpjZGVmZ2hpanN0dXZ3eHl6goOEhYaHiImKkpOUlZaXmJmaoqOkpaanqKmqsrO0tba3"
+    "uLm6wsPExcbHyMnK0tPU1dbX2Nna4uPk5ebn6Onq8vP09fb3+Pn6/9oADAMBAAIRAxEAPwDnKKKK"
+    "+tO4/9k="
+)
+
+
+def route(method, path):
+    """Register a handler for `method` and `path` on the stub server."""
+    def decorator(func):
+        ROUTES[(method, path)] = func
+        return func
+    return decorator
+
+
+class StubState:
+    """Mutable server-side state shared by all handler threads."""
+
+    def add_note(self, email, text, emotion, date_created=None):
+        """Store a new note for `email` (call with the lock held) and return it."""
+        version = self.note_versions.get(email, 0) + 1
+        self.note_versions[email] = version
+        notes = self.notes.setdefault(email, [])
+        note = {'id': sum(len(n) for n in self.notes.values()), 'text': text, 'emotion': emotion,
+                'date_created': date_created or datetime.now().isoformat(timespec='seconds'), 'version': version}
+        notes.append(note)
+        return note
+
+    def notes_delta(self, email, since):
+        """Notes of `email` changed after version `since` (call with the lock held)."""
+        version = self.note_versions.get(email, 0)
+        notes = [note for note in self.notes.get(email, []) if note['version'] > since]
+        return {'version': version, 'notes': notes, 'removed': [], 'etag': f'"{version}"'}
+
+    def user_record(self, email):
+        """The full record of `email` as the API returns it (call with the lock held)."""
+        user = dict(self.users.get(email, {'email': email}))
+        user['notes'] = list(self.notes.get(email, []))
+        user['notes_version'] = self.note_versions.get(email, 0)
+        return user
+
+    def seed_user(self, email, password, name="Demo", notes=0):
+        """Create an account with `notes` generated diary notes, one per hour."""
+        with self.lock:
+            self.users[email] = {'email': email, 'name': name}
+            self.passwords[email] = password
+            start = datetime(2020, 1, 1).timestamp()
+            for i in range(notes):
+                date = datetime.fromtimestamp(start + 3600 * i).isoformat(timespec='seconds')
+                self.add_note(email, f"Demo note {i}", EMOTIONS[i % len(EMOTIONS)], date)
+
+    def __init__(self, latency=0.0, item_latency=0.0):
+        self.latency = latency
+        self.item_latency = item_latency
+        self.lock = threading.Lock()
+        self.upload_dir = tempfile.mkdtemp(prefix="stub_uploads_")
+        self.uploads = {}  # upload_id -> {'path', 'offset', 'length'}
+        self.image_batches = {}  # upload_id -> number of images received
+        self.notes = {}  # email -> list of notes, each with a unique 'id' and the 'version' it last changed in
+        self.note_versions = {}  # email -> current notes version
+        self.users = {}  # email -> profile fields
+        self.passwords = {}  # email -> password
+        self.profiles = {}  # digest -> canonical profile JSON uploaded to /profiles
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY small responses wait on delayed ACKs
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        return gzip.decompress(body) if self.headers.get('Content-Encoding') == 'gzip' else body
+
+    def read_form(self):
+        """Return `(fields, files)` from a urlencoded or multipart/form-data body."""
+        body = self.read_body()
+        content_type = self.headers.get('Content-Type', '')
+        if not content_type.startswith('multipart/form-data'):
+            return {k: v[-1] for k, v in parse_qs(body.decode()).items()}, []
+
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        fields, files = {}, []
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            filename = part.get_filename()
+            if filename is None:
+                fields[name] = part.get_content().strip() if part.get_content_maintype() == 'text' \
+                    else part.get_payload(decode=True).decode()
+            else:
+                files.append((name, filename, part.get_payload(decode=True)))
+        return fields, files
+
+    def send(self, status, body=b'', content_type="text/plain", headers=None):
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data, headers=None):
+        self.send(status, json.dumps(data), "application/json", headers)
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        handler = ROUTES.get((method, url.path))
+        if handler is None:
+            self.read_body()
+            return self.send(404, "Not found")
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        handler(self)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+
+# ------------------- Notes -------------------
+
+def note_key(note):
+    return note['date_created'], note['id']
+
+
+@route("GET", "/notes")
+def notes_page(handler):
+    """Notes newest first; the cursor is the key of the last note already returned."""
+    limit = int(handler.query.get('limit', 20))
+    cursor = handler.query.get('cursor')
+    with handler.state.lock:
+        notes = sorted(handler.state.notes.get(handler.query.get('email'), []), key=note_key, reverse=True)
+    if cursor:
+        date_created, _, note_id = cursor.rpartition('|')
+        notes = [note for note in notes if note_key(note) < (date_created, int(note_id))]
+    page = notes[:limit]
+    next_cursor = f"{page[-1]['date_created']}|{page[-1]['id']}" if len(notes) > limit else None
+    handler.send_json(200, {'notes': page, 'next_cursor': next_cursor})
+
+
+@route("GET", "/notes/changes")
+def notes_changes(handler):
+    email = handler.query.get('email')
+    since = int(handler.query.get('since') or 0)
+    with handler.state.lock:
+        delta = handler.state.notes_delta(email, since)
+    if handler.headers.get('If-None-Match') == delta['etag']:
+        return handler.send(304, headers={'ETag': delta['etag']})
+    handler.send_json(200, delta, headers={'ETag': delta['etag']})
+
+
+# ------------------- Classification -------------------
+
+EMOTIONS = ['sadness', 'joy', 'love', 'anger', 'fear', 'surprise']
+
+
+def classify_text(state, text):
+    """Deterministic "prediction" so repeated texts classify the same way; takes `item_latency` per text."""
+    if state.item_latency:
+        time.sleep(state.item_latency)
+    digest = hashlib.sha256(text.encode()).digest()
+    confs = {emotion: digest[i] for i, emotion in enumerate(EMOTIONS)}
+    total = sum(confs.values()) or 1
+    confs = {emotion: round(100 * value / total, 2) for emotion, value in confs.items()}
+    return max(confs, key=confs.get), confs
+
+
+@route("POST", "/text_classification")
+def text_classification(handler):
+    fields, _ = handler.read_form()
+    email = fields.get('email')
+    pred, confs = classify_text(handler.state, fields.get('input_text', ''))
+
+    with handler.state.lock:
+        if email:
+            handler.state.add_note(email, fields.get('input_text', ''), pred, fields.get('date_created'))
+        if fields.get('since') is not None:
+            body = {'pred': pred, 'confs': confs, 'notes_delta': handler.state.notes_delta(email, int(fields['since']))}
+        else:
+            body = {'pred': pred, 'confs': confs, 'user_data': handler.state.user_record(email)}
+    handler.send_json(200, body)
+
+
+@route("POST", "/text_classification/batch")
+def text_classification_batch(handler):
+    """Classify `{'email', 'entries': [{'text', 'date_created'?}]}`; answers the results and the notes created."""
+    data = json.loads(handler.read_body())
+    email = data.get('email')
+    results = [classify_text(handler.state, entry.get('text', '')) for entry in data.get('entries', [])]
+    with handler.state.lock:
+        notes = [handler.state.add_note(email, entry.get('text', ''), pred, entry.get('date_created'))
+                 for entry, (pred, _) in zip(data.get('entries', []), results)] if email else []
+    handler.send_json(200, {'results': [{'pred': pred, 'confs': confs} for pred, confs in results], 'notes': notes})
+
+
+@route("POST", "/audio_classification")
+def audio_classification(handler):
+    _, files = handler.read_form()
+    if not files or not files[0][2]:
+        return handler.send(400, "No audio file")
+    pred, _ = classify_text(handler.state, hashlib.sha256(files[0][2]).hexdigest())
+    handler.send(200, pred)
+
+
+# ------------------- Accounts -------------------
+
+@route("POST", "/signup")
+def signup(handler):
+    fields, _ = handler.read_form()
+    email = fields.get('email')
+    with handler.state.lock:
+        if not email or email in handler.state.users:
+            return handler.send_json(400, {'error': "Email missing or already registered"})
+        handler.state.users[email] = {k: v for k, v in fields.items() if k != 'password'}
+        handler.state.passwords[email] = fields.get('password', '')
+        user = handler.state.user_record(email)
+    handler.send_json(200, user)
+
+
+@route("POST", "/signin")
+def signin(handler):
+    fields, _ = handler.read_form()
+    email = fields.get('email')
+    with handler.state.lock:
+        if email not in handler.state.users or handler.state.passwords.get(email) != fields.get('password'):
+            return handler.send_json(401, {'error': "Invalid email or password"})
+        # fields=identity skips the notes; the client fetches them from /profile afterwards
+        if fields.get('fields') == 'identity':
+            user = dict(handler.state.users[email])
+        else:
+            user = handler.state.user_record(email)
+    handler.send_json(200, {'user_data': user})
+
+
+@route("GET", "/profile")
+def profile(handler):
+    email = handler.query.get('email')
+    with handler.state.lock:
+        if email not in handler.state.users:
+            return handler.send_json(404, {'error': "Unknown user"})
+        user = handler.state.user_record(email)
+    handler.send_json(200, {'user_data': user})
+
+
+# ------------------- Recommendations -------------------
+
+ACTIVITIES = ["Go for a walk", "Call a friend", "Write a gratitude list", "Try a breathing exercise",
+              "Listen to your favourite album", "Cook something new"]
+
+
+def canonical_json(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), default=str).encode()
+
+
+@route("POST", "/profiles")
+def upload_profile(handler):
+    profile = json.loads(handler.read_body())
+    body = canonical_json(profile)
+    digest = hashlib.sha256(body).hexdigest()
+    with handler.state.lock:
+        handler.state.profiles[digest] = body
+    handler.send_json(200, {'digest': digest})
+
+
+@route("POST", "/recommend")
+def recommend(handler):
+    emotion = handler.query.get('emotion', '')
+    if 'profile' in handler.query:
+        with handler.state.lock:
+            profile = handler.state.profiles.get(handler.query['profile'])
+        if profile is None:
+            return handler.send_json(404, {'error': "Unknown profile, upload it again"})
+    else:
+        user = json.loads(handler.read_body())
+        profile = canonical_json({k: v for k, v in user.items() if k not in ('notes', 'notes_version')})
+    # Deterministic "recommendation" for the profile and emotion
+    digest = hashlib.sha256(profile + emotion.encode()).digest()
+    activity = ACTIVITIES[digest[0] % len(ACTIVITIES)]
+    handler.send_json(200, {'recomendation': activity,
+                            'description': f"{activity} - a good fit when you feel {emotion.lower() or 'unsure'}."})
+
+
+# ------------------- Webcam -------------------
+
+@route("GET", "/video_feed")
+def video_feed(handler):
+    handler.send_response(200)
+    handler.send_header('Content-Type', "multipart/x-mixed-replace; boundary=frame")
+    handler.send_header('Connection', "close")
+    handler.end_headers()
+    handler.close_connection = True
+    try:
+        while True:
+            handler.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + SAMPLE_JPEG + b'\r\n')
+            handler.wfile.flush()
+            time.sleep(1 / 15)
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+
+
+@route("POST", "/stop")
+def stop(handler):
+    handler.read_body()
+    handler.send(200, "happy")
+
+
+# ------------------- Video upload -------------------
+
+@route("POST", "/upload_video")
+def upload_video(handler):
+    handler.read_body()
+    handler.send(200, "happy")
+
+
+@route("GET", "/upload_video/status")
+def upload_video_status(handler):
+    with handler.state.lock:
+        upload = handler.state.uploads.get(handler.query.get('upload_id'))
+    if upload is None:
+        return handler.send_json(404, {'offset': 0})
+    handler.send_json(200, {'offset': upload['offset'], 'length': upload['length']})
+
+
+@route("POST", "/upload_video/chunk")
+def upload_video_chunk(handler):
+    state = handler.state
+    upload_id = handler.headers['Upload-Id']
+    offset = int(handler.headers['Upload-Offset'])
+    length = int(handler.headers['Upload-Length'])
+    chunk = handler.read_body()
+
+    with state.lock:
+        upload = state.uploads.setdefault(upload_id, {
+            'path': os.path.join(state.upload_dir, hashlib.sha1(upload_id.encode()).hexdigest()),
+            'offset': 0,
+            'length': length,
+            'filename': unquote(handler.headers.get('X-Filename', '')),
+        })
+        if offset != upload['offset']:
+            return handler.send_json(409, {'offset': upload['offset']})
+        with open(upload['path'], 'ab') as f:
+            f.write(chunk)
+        upload['offset'] += len(chunk)
+
+        if upload['offset'] < upload['length']:
+            return handler.send_json(202, {'offset': upload['offset']})
+
+        # All chunks received: reassemble and "detect" the emotion
+        del state.uploads[upload_id]
+    with open(upload['path'], 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    os.remove(upload['path'])
+    handler.send(200, "happy", headers={'X-Content-SHA256': digest, 'X-Filename': quote(upload['filename'])})
+
+
+def count_images(files):
+    """Count images in an upload, looking inside .npz files."""
+    count = 0
+    for _, filename, data in files:
+        if filename.endswith('.npz'):
+            with np.load(io.BytesIO(data)) as archive:
+                count += sum(len(archive[key]) for key in archive.files)
+        else:
+            count += 1
+    return count
+
+
+def image_batches(handler):
+    fields, files = handler.read_form()
+    upload_id = fields.get('upload_id', '')
+    with handler.state.lock:
+        total = handler.state.image_batches.get(upload_id, 0) + count_images(files)
+        if fields.get('final') != '1':
+            handler.state.image_batches[upload_id] = total
+            return handler.send_json(202, {'images': total})
+        handler.state.image_batches.pop(upload_id, None)
+    if not total:
+        return handler.send(422, "No images received")
+    handler.send(200, "happy", headers={'X-Image-Count': str(total)})
+
+
+route("POST", "/upload_faces")(image_batches)
+route("POST", "/upload_frames")(image_batches)
+
+
+def serve(host="127.0.0.1", port=0, latency=0.0, item_latency=0.0):
+    """Start the stub API on a background thread and return the server."""
+    handler = type("BoundStubHandler", (StubHandler,), {'state': StubState(latency, item_latency)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of artificial delay per request")
+    parser.add_argument("--item-latency", type=float, default=0.0,
+                        help="Seconds of artificial model time per classified text")
+    parser.add_argument("--demo-notes", type=int, default=0, metavar="N",
+                        help="Create demo@example.com (password 'demo') with N diary notes")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.item_latency)
+    if args.demo_notes:
+        server.RequestHandlerClass.state.seed_user("demo@example.com", "demo", notes=args.demo_notes)
+    print(f"Stub API listening on {base_url(server)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
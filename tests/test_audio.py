@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from utils.audio import resample
+
+
+@pytest.mark.parametrize("length", [1, 10, 64, 65, 48000])
+def test_resample_length(length):
+    signal = np.random.default_rng(0).standard_normal(length).astype(np.float32)
+    assert len(resample(signal, 48000, 16000)) == round(length / 3)
+    assert len(resample(signal, 8000, 16000)) == 2 * length
+
+
+def test_resample_low_passes_before_downsampling():
+    rate, target = 44100, 16000
+    t = np.arange(rate) / rate
+    signal = (np.sin(2 * np.pi * 440 * t) + np.sin(2 * np.pi * 15000 * t)).astype(np.float32)
+    out = resample(signal, rate, target)
+    spectrum = np.abs(np.fft.rfft(out))
+    freqs = np.fft.rfftfreq(len(out), 1 / target)
+    # 15 kHz is above the new Nyquist frequency and must not alias down to 1 kHz
+    assert spectrum[np.argmin(np.abs(freqs - 1100))] < 0.01 * spectrum[np.argmin(np.abs(freqs - 440))]
@@ -0,0 +1,66 @@
+import io
+
+import pytest
+
+from utils.journal import iter_entries, parse_date
+
+
+def entries(content, name, errors=None):
+    return list(iter_entries(io.BytesIO(content.encode('utf-8')), name, errors))
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-01-05", "2024-01-05T00:00:00"),
+    ("2024-01-05 08:30", "2024-01-05T08:30:00"),
+    ("2024-01-05T08:30:15.250", "2024-01-05T08:30:15"),
+    ("05/01/2024", "2024-01-05T00:00:00"),
+    ("05.01.2024 21:10", "2024-01-05T21:10:00"),
+    ("2024/01/05", "2024-01-05T00:00:00"),
+    ("yesterday", None),
+    ("31/02/2024", None),
+])
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+
+def test_csv_dates_are_normalised():
+    journal = "Date,Entry\n05/01/2024,Cold morning\n2024-01-06 10:00,Warmer\n,No date\n"
+    assert entries(journal, "journal.csv") == [
+        {'text': "Cold morning", 'date_created': "2024-01-05T00:00:00"},
+        {'text': "Warmer", 'date_created': "2024-01-06T10:00:00"},
+        {'text': "No date"},
+    ]
+
+
+def test_csv_unreadable_date_is_counted():
+    errors = []
+    journal = "date,text\nsoon,Later\n2024-01-05,Fine\n"
+    assert entries(journal, "journal.csv", errors) == [{'text': "Fine", 'date_created': "2024-01-05T00:00:00"}]
+    assert errors == [2]
+    with pytest.raises(ValueError):
+        entries(journal, "journal.csv")
+
+
+def test_jsonl_dates():
+    errors = []
+    journal = '\n'.join([
+        '{"text": "Aware", "created_at": "2024-01-05T08:00:00+00:00"}',
+        '{"text": "Bad", "date": "someday"}',
+        '{"text": "Day first", "date": "05/01/2024 07:45"}',
+        'not json',
+    ])
+    result = entries(journal, "journal.jsonl", errors)
+    assert [entry['text'] for entry in result] == ["Aware", "Day first"]
+    assert result[0]['date_created'] == parse_date("2024-01-05T08:00:00+00:00")
+    assert result[1]['date_created'] == "2024-01-05T07:45:00"
+    assert errors == [2, 4]
+
+
+def test_txt_date_lines():
+    journal = "2024-01-05\nFirst day.\n\n05/01/2024 09:00\nSecond\nentry\n\n2024-13-45\nNot a date\n\nJust text\n"
+    assert entries(journal, "journal.txt") == [
+        {'text': "First day.", 'date_created': "2024-01-05T00:00:00"},
+        {'text': "Second entry", 'date_created': "2024-01-05T09:00:00"},
+        {'text': "2024-13-45 Not a date"},
+        {'text': "Just text"},
+    ]
@@ -0,0 +1,64 @@
+import random
+
+from utils.mjpeg import FramePacer
+
+
+def run(pacer, ticks, render_seconds=0.0):
+    """Offer a frame at each tick time; return the times rendered."""
+    rendered = []
+    for now in ticks:
+        if pacer.ready(now):
+            pacer.rendered(now, render_seconds)
+            rendered.append(now)
+    return rendered
+
+
+def test_jittered_ticks_render_at_full_rate():
+    rng = random.Random(0)
+    ticks = [i / 15 + rng.uniform(-0.02, 0.02) for i in range(150)]
+    pacer = FramePacer(15)
+    rendered = run(pacer, ticks)
+    assert len(rendered) / (ticks[-1] - ticks[0]) > 14.5
+    assert pacer.dropped_frames <= 2
+
+
+def test_never_exceeds_cap():
+    pacer = FramePacer(10)
+    rendered = run(pacer, [i / 60 for i in range(600)])
+    assert len(rendered) <= 101
+    assert pacer.rendered_frames == len(rendered)
+    assert pacer.dropped_frames == 600 - len(rendered)
+
+
+def test_stall_does_not_cause_burst():
+    pacer = FramePacer(10)
+    run(pacer, [i / 10 for i in range(10)])
+    rendered = run(pacer, [5 + i / 60 for i in range(60)])
+    assert len(rendered) <= 11
+
+
+def test_backs_off_on_overrun_and_recovers():
+    pacer = FramePacer(15)
+    run(pacer, [i / 15 for i in range(30)], render_seconds=0.1)
+    assert pacer.interval > 1 / 15
+    assert pacer.fps < 15
+    slow = pacer.interval
+    run(pacer, [2 + i / 15 for i in range(200)], render_seconds=0.01)
+    assert pacer.interval < slow
+    assert pacer.interval == 1 / 15
+
+
+def test_backoff_is_bounded():
+    pacer = FramePacer(15, max_interval=0.5)
+    run(pacer, [i / 15 for i in range(300)], render_seconds=1.0)
+    assert pacer.interval == 0.5
+
+
+def test_set_max_fps():
+    pacer = FramePacer(15)
+    pacer.set_max_fps(5)
+    assert pacer.min_interval == pacer.interval == 1 / 5
+    rendered = run(pacer, [i / 30 for i in range(300)])
+    assert len(rendered) <= 51
+    pacer.set_max_fps(30)
+    assert pacer.interval == 1 / 30
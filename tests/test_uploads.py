@@ -0,0 +1,26 @@
+import hashlib
+import os
+import uuid
+from urllib.parse import unquote
+
+import pytest
+
+import stub_api
+from utils.api_client import ApiClient
+from utils.uploads import upload_chunked
+
+
+@pytest.fixture
+def client():
+    server = stub_api.serve()
+    yield ApiClient(stub_api.base_url(server))
+    server.shutdown()
+
+
+@pytest.mark.parametrize("filename", ["clip.mp4", "视频 😀.mp4", "café ñ.mov"])
+def test_upload_chunked_filename(client, filename):
+    data = os.urandom(300 * 1024)
+    response = upload_chunked(client, "/upload_video", filename, data, uuid.uuid4().hex, chunk_size=64 * 1024)
+    assert response.status_code == 200
+    assert response.headers['X-Content-SHA256'] == hashlib.sha256(data).hexdigest()
+    assert unquote(response.headers['X-Filename']) == filename
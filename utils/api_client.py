@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+
+import requests
+import streamlit as st
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+load_dotenv()
+
+# Base URL of the Flask API
+API_BASE_URL = os.getenv("API__URL", "http://localhost:5000")
+
+# Connection settings, overridable from the environment
+CONNECT_TIMEOUT = float(os.getenv("API__CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("API__READ_TIMEOUT", "60"))
+POOL_SIZE = int(os.getenv("API__POOL_SIZE", "10"))
+MAX_RETRIES = int(os.getenv("API__MAX_RETRIES", "3"))
+
+
+class ApiClient:
+    """Pooled keep-alive client for the Flask API that records per-endpoint metrics."""
+
+    def __init__(self, base_url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), pool_size=POOL_SIZE, max_retries=MAX_RETRIES):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+        # Retry only idempotent methods on read/status errors; connect errors are safe for all
+        retry = Retry(total=max_retries,
+                      backoff_factor=0.3,
+                      status_forcelist=(502, 503, 504),
+                      allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                      raise_on_status=False)
+        # Never block on an exhausted pool: requests passes no pool timeout, so a blocked caller would wait
+        # forever. Connections beyond `pool_size` are opened as needed and discarded after use.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _record(self, endpoint, elapsed, error):
+        with self._lock:
+            m = self._metrics.setdefault(endpoint, {'calls': 0, 'errors': 0, 'total_s': 0.0, 'max_s': 0.0})
+            m['calls'] += 1
+            m['errors'] += int(error)
+            m['total_s'] += elapsed
+            m['max_s'] = max(m['max_s'], elapsed)
+
+    def request(self, method, endpoint, **kwargs):
+        """Send a request to `endpoint` (e.g. "/recommend") through the shared pool."""
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + endpoint, **kwargs)
+        except requests.RequestException:
+            self._record(endpoint, time.perf_counter() - start, error=True)
+            raise
+        self._record(endpoint, time.perf_counter() - start, error=response.status_code >= 400)
+        return response
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request("POST", endpoint, **kwargs)
+
+    def stats(self):
+        """Return a snapshot of call count, error count and latency per endpoint."""
+        with self._lock:
+            return {
+                endpoint: {**m, 'mean_s': m['total_s'] / m['calls'] if m['calls'] else 0.0}
+                for endpoint, m in self._metrics.items()
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_client(base_url=API_BASE_URL):
+    """Process-wide client, one connection pool per backend URL."""
+    return ApiClient(base_url)
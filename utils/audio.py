@@ -0,0 +1,219 @@
+import io
+import os
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from utils.emotions import standardize_emotion_label
+from utils.result_cache import result_key
+from utils.taxonomy import EMOTIONS, emotion_code
+from utils.uploads import post_file
+
+# Audio files classified at once, overridable from the environment
+AUDIO_WORKERS = int(os.getenv("AUDIO__WORKERS", "4"))
+
+# Sample rate audio is resampled to before upload; speech emotion models use 16 kHz
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO__SAMPLE_RATE", "16000"))
+# Frames quieter than this many dB below the loudest frame count as silence
+SILENCE_THRESHOLD_DB = 40.0
+# Length of the frames the energy gate measures, and of the margin kept around speech
+GATE_FRAME_MS = 20
+GATE_PADDING_MS = 100
+# Result cache variant of preprocessed uploads; a change to any setting above changes what is classified
+COMPACT_VARIANT = f"compact-{AUDIO_SAMPLE_RATE}hz-{SILENCE_THRESHOLD_DB:g}db-{GATE_FRAME_MS}-{GATE_PADDING_MS}ms"
+
+# Length and spacing of the overlapping windows long recordings are classified in
+WINDOW_SECONDS = 3.0
+WINDOW_HOP_SECONDS = 1.5
+
+_PCM_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def decode_wav(data):
+    """Decode PCM WAV bytes to `(samples, rate)`, samples as float32 in [-1, 1] shaped (frames, channels)."""
+    with wave.open(io.BytesIO(data)) as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    if width == 3:
+        # 24-bit: widen each sample to 32 bits by putting it in the top three bytes
+        padded = np.zeros((len(raw) // 3, 4), np.uint8)
+        padded[:, 1:] = np.frombuffer(raw, np.uint8).reshape(-1, 3)
+        samples, scale = padded.view('<i4').ravel(), 2.0 ** 31
+    else:
+        samples, scale = np.frombuffer(raw, _PCM_DTYPES[width]), 2.0 ** (8 * width - 1)
+    samples = samples.astype(np.float32)
+    if width == 1:
+        samples -= 128  # 8-bit WAV is unsigned
+    return (samples / scale).reshape(-1, channels), rate
+
+
+def downmix(samples):
+    """Average the channels of a (frames, channels) signal into a mono one."""
+    return samples.mean(axis=1, dtype=np.float32) if samples.shape[1] > 1 else samples[:, 0]
+
+
+def resample(signal, rate, target_rate):
+    """
+    Resample a mono signal to `target_rate`.
+
+    Downsampling first low-passes with a Hann-windowed sinc at the new Nyquist
+    frequency so higher frequencies do not alias, then interpolates.
+    """
+    if rate == target_rate or len(signal) == 0:
+        return signal
+    if target_rate < rate:
+        cutoff = target_rate / rate / 2
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hanning(len(taps))
+        # The centred len(signal) of the full convolution; mode='same' returns len(kernel) samples for shorter clips
+        filtered = np.convolve(signal, (kernel / kernel.sum()).astype(np.float32), mode='full')
+        signal = filtered[len(taps) // 2:len(taps) // 2 + len(signal)]
+    count = int(round(len(signal) * target_rate / rate))
+    positions = np.arange(count) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(signal)), signal).astype(np.float32)
+
+
+def trim_silence(signal, rate, threshold_db=SILENCE_THRESHOLD_DB, frame_ms=GATE_FRAME_MS, padding_ms=GATE_PADDING_MS):
+    """
+    Cut leading and trailing silence, using the RMS energy of `frame_ms` frames against the loudest one.
+
+    A recording with nothing above the gate (e.g. all zeros) is returned untrimmed.
+    """
+    frame = max(int(rate * frame_ms / 1000), 1)
+    count = len(signal) // frame
+    if count == 0:
+        return signal
+    energy = np.sqrt(np.mean(np.square(signal[:count * frame].reshape(count, frame)), axis=1))
+    loud = np.flatnonzero(energy > energy.max() * 10 ** (-threshold_db / 20))
+    if len(loud) == 0:
+        return signal
+    padding = int(rate * padding_ms / 1000)
+    return signal[max(loud[0] * frame - padding, 0):min((loud[-1] + 1) * frame + padding, len(signal))]
+
+
+def encode_wav(signal, rate):
+    """Encode a mono float signal as 16-bit PCM WAV bytes."""
+    pcm = (np.clip(signal, -1, 1) * 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def load_signal(data, rate=AUDIO_SAMPLE_RATE, trim=True):
+    """
+    Decode an uploaded recording to a mono float32 signal at `rate`, optionally
+    silence-trimmed. Returns None for files that cannot be decoded locally
+    (MP3, compressed or float WAV).
+    """
+    try:
+        samples, source_rate = decode_wav(data)
+    except (wave.Error, EOFError, KeyError, ValueError):
+        return None
+    signal = resample(downmix(samples), source_rate, rate)
+    return trim_silence(signal, rate) if trim else signal
+
+
+def preprocess_audio(data, rate=AUDIO_SAMPLE_RATE):
+    """
+    Compact an uploaded recording for the speech emotion model: decoded, mono,
+    resampled to `rate` and silence-trimmed, as 16-bit PCM WAV bytes.
+
+    Returns None for files that cannot be decoded locally or hold no samples,
+    which are then uploaded as they are.
+    """
+    signal = load_signal(data, rate)
+    return None if signal is None or len(signal) == 0 else encode_wav(signal, rate)
+
+
+def sliding_windows(signal, rate, window_seconds=WINDOW_SECONDS, hop_seconds=WINDOW_HOP_SECONDS):
+    """
+    Overlapping windows of a mono signal as `(start_sample, window)` pairs.
+
+    Every window is a row of one strided view of the signal, so none of them
+    copies it. The last window is aligned with the end of the signal so the
+    tail is covered; a signal shorter than a window is a single window.
+    """
+    size = int(window_seconds * rate)
+    if len(signal) <= size:
+        return [(0, signal)]
+    view = np.lib.stride_tricks.sliding_window_view(signal, size)
+    starts = list(range(0, len(view), max(int(hop_seconds * rate), 1)))
+    if starts[-1] != len(view) - 1:
+        starts.append(len(view) - 1)
+    return [(start, view[start]) for start in starts]
+
+
+def classify_windows(client, name, signal, rate, workers=AUDIO_WORKERS, window_seconds=WINDOW_SECONDS,
+                     hop_seconds=WINDOW_HOP_SECONDS):
+    """
+    Classify overlapping windows of `signal` concurrently, at most `workers` at a time.
+
+    Yields `(start_seconds, end_seconds, emotion, error)` in the order windows
+    finish, so the first result is available as soon as any window is done.
+    """
+    def classify(index, start, window):
+        try:
+            emotion = classify_audio(client, f"{index:04d}-{name}", encode_wav(window, rate))
+            return start / rate, (start + len(window)) / rate, emotion, None
+        except Exception as e:
+            return start / rate, (start + len(window)) / rate, None, e
+
+    windows = sliding_windows(signal, rate, window_seconds, hop_seconds)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audio-windows") as pool:
+        futures = [pool.submit(classify, index, start, window) for index, (start, window) in enumerate(windows)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def overall_emotion(emotions):
+    """Most frequent emotion across windows, ties going to the earlier emotion in the taxonomy."""
+    codes = [code for code in map(emotion_code, emotions) if code >= 0]
+    if not codes:
+        return None
+    return EMOTIONS[int(np.bincount(codes).argmax())]
+
+
+def classify_audio(client, name, data, content_type="audio/wav"):
+    """Upload one audio file for classification and return its standardized emotion."""
+    response = post_file(client, "/audio_classification", "audio_file", name, data, content_type)
+    response.raise_for_status()
+    return standardize_emotion_label(response.text.strip())
+
+
+def classify_audio_files(client, files, workers=AUDIO_WORKERS, preprocess=True, cache=None):
+    """
+    Classify uploaded audio files concurrently, at most `workers` at a time.
+
+    With `preprocess`, WAV files are compacted with `preprocess_audio` first.
+    Files found in the result `cache` are not uploaded again. Yields
+    `(file, emotion, error, seconds)` in the order the files finish; a file
+    that fails is yielded with its exception and the rest carry on.
+    """
+    def classify(audio_file):
+        start = time.perf_counter()
+        try:
+            data = audio_file.getvalue()
+            key = result_key(data, 'audio', COMPACT_VARIANT if preprocess else 'raw')
+            emotion = cache.get(key) if cache is not None else None
+            if emotion is None:
+                compact = preprocess_audio(data) if preprocess else None
+                if compact is not None:
+                    emotion = classify_audio(client, audio_file.name, compact, "audio/wav")
+                else:
+                    emotion = classify_audio(client, audio_file.name, data, audio_file.type or "audio/wav")
+                if cache is not None:
+                    cache.put(key, emotion)
+            return emotion, None, time.perf_counter() - start
+        except Exception as e:
+            return None, e, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audio-classification") as pool:
+        futures = {pool.submit(classify, audio_file): audio_file for audio_file in files}
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# Most markers drawn for a raw emotions series; denser windows are downsampled with LTTB
+MAX_POINTS = 500
+# Windows longer than this are shown as emotion distributions per day/week/month
+AGGREGATE_AFTER_DAYS = 180
+# Most buckets in a distribution chart
+MAX_BUCKETS = 120
+
+# Resampling frequencies tried in order, with their approximate length in days
+FREQUENCIES = [('D', 'Daily', 1), ('W', 'Weekly', 7), ('ME', 'Monthly', 30.4), ('QE', 'Quarterly', 91.3),
+               ('YE', 'Yearly', 365.25)]
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of at most `threshold` points of `(x, y)` that keep the
+    visual shape of the series: the first and last points, plus from each bucket
+    the point forming the largest triangle with the previous pick and the average
+    of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def select_window(frame, days=None):
+    """Return the rows of a date-sorted timeline frame within `days` of its latest note."""
+    if days is None or frame.empty:
+        return frame
+    dates = frame['date_created'].to_numpy()
+    start = np.searchsorted(dates, dates[-1] - np.timedelta64(days, 'D'), side='left')
+    return frame.iloc[start:]
+
+
+def choose_frequency(span_days, max_buckets=MAX_BUCKETS):
+    """Pick the finest resampling frequency that keeps the bucket count under `max_buckets`."""
+    for freq, name, length in FREQUENCIES:
+        if span_days / length <= max_buckets:
+            return freq, name
+    return FREQUENCIES[-1][:2]
+
+
+def emotion_distribution(frame, freq):
+    """Count notes per emotion per `freq` bucket; columns follow the emotion category order."""
+    counts = pd.get_dummies(frame['emotion_label']).set_axis(frame['date_created'], axis=0)
+    counts = counts.resample(freq).sum()
+    # Leave out emotions that never occur rather than drawing empty series
+    return counts.loc[:, counts.any()]
+
+
+def chart_data(frame, days=None, max_points=MAX_POINTS):
+    """
+    Choose the chart resolution for the visible window of a timeline frame.
+
+    Returns `('points', rows)` with at most `max_points` rows (LTTB-downsampled if
+    needed), or `('distribution', (name, counts))` with per-bucket emotion counts
+    for windows longer than AGGREGATE_AFTER_DAYS. Either way the size of the data
+    is bounded regardless of how many notes there are.
+    """
+    if frame['date_created'].hasnans:
+        # Notes with an unreadable date have no place on a time axis
+        frame = frame[frame['date_created'].notna()]
+    window = select_window(frame, days)
+    if window.empty:
+        return 'points', window
+
+    span_days = (window['date_created'].iloc[-1] - window['date_created'].iloc[0]) / pd.Timedelta(days=1)
+    if len(window) > max_points and span_days > AGGREGATE_AFTER_DAYS:
+        freq, name = choose_frequency(span_days)
+        return 'distribution', (name, emotion_distribution(window, freq))
+
+    if len(window) > max_points:
+        x = window['date_created'].to_numpy().astype('datetime64[ns]').astype(np.int64)
+        x = x - x[0]
+        y = window['emotion_label'].cat.codes.to_numpy()
+        window = window.iloc[lttb(x, y, max_points)]
+    return 'points', window
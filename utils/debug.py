@@ -0,0 +1,11 @@
+import os
+
+import streamlit as st
+
+# Show developer panels (rerun timings, cache counters) in every session; `?debug=1` shows them in one
+DEBUG_PANELS = os.getenv("DEBUG__PANELS", "").lower() in ("1", "true", "yes")
+
+
+def show_debug_panels():
+    """Whether this session shows developer panels."""
+    return DEBUG_PANELS or st.query_params.get('debug', '').lower() in ("1", "true", "yes")
@@ -0,0 +1,85 @@
+import pandas as pd
+
+from utils.taxonomy import EMOTION_LABELS, standardize_labels
+
+# Diary entries fetched and rendered per "Load more"
+DIARY_PAGE_SIZE = 20
+
+# Marks cursors served from the local timeline, which can't be mixed with the API's keyset cursors
+LOCAL_CURSOR_PREFIX = "local:"
+
+
+def local_cursor(seen):
+    """Local cursor for the page after the newest `seen` entries."""
+    return f"{LOCAL_CURSOR_PREFIX}{seen}"
+
+
+def is_local_cursor(cursor):
+    return cursor is not None and cursor.startswith(LOCAL_CURSOR_PREFIX)
+
+
+def display_entries(notes):
+    """Precompute the strings shown for each note, parsing all dates in one vectorized call."""
+    if not notes:
+        return []
+    dates = pd.to_datetime(pd.Series([note.get('date_created') for note in notes]), format='ISO8601', errors='coerce')
+    dates = dates.dt.strftime('%Y-%m-%d %H:%M').fillna("Undated")
+    emotions = standardize_labels([note.get('emotion') for note in notes])
+    return [
+        {'title': title, 'text': note.get('text', 'No text'), 'emotion': EMOTION_LABELS.get(emotion, emotion)}
+        for note, title, emotion in zip(notes, dates, emotions)
+    ]
+
+
+def fetch_remote_page(client, email, cursor=None, limit=DIARY_PAGE_SIZE):
+    """
+    Fetch one page of notes, newest first, from the `/notes` cursor API.
+
+    Returns `(notes, next_cursor)`; `next_cursor` is None on the last page.
+    Raises LookupError if the API has no `/notes` endpoint.
+    """
+    params = {'email': email, 'limit': limit}
+    if cursor is not None:
+        params['cursor'] = cursor
+    response = client.get("/notes", params=params)
+    if response.status_code == 404:
+        raise LookupError("The API does not support paginated notes")
+    response.raise_for_status()
+    data = response.json()
+    return data['notes'], data.get('next_cursor')
+
+
+def fetch_local_page(timeline, cursor=None, limit=DIARY_PAGE_SIZE):
+    """Serve the same cursor protocol from the session's EmotionTimeline (see `local_cursor`)."""
+    seen = int(cursor[len(LOCAL_CURSOR_PREFIX):]) if cursor is not None else 0
+    end = len(timeline.frame) - seen
+    rows = timeline.frame.iloc[max(end - limit, 0):end].iloc[::-1]
+    notes = [{'date_created': date, 'text': text, 'emotion': emotion}
+             for date, text, emotion in zip(rows['date_created'], rows['text'], rows['emotion'])]
+    next_seen = seen + len(notes)
+    return notes, (local_cursor(next_seen) if next_seen < len(timeline.frame) else None)
+
+
+class DiaryPager:
+    """Diary entries loaded one page at a time, with their display strings computed once."""
+
+    def __init__(self, fetch_page, page_size=DIARY_PAGE_SIZE):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.entries = []
+        self.next_cursor = None
+        self.loaded = False
+
+    @property
+    def has_more(self):
+        return not self.loaded or self.next_cursor is not None
+
+    def load_more(self):
+        """Fetch the next page and return only its new entries."""
+        if not self.has_more:
+            return []
+        notes, self.next_cursor = self.fetch_page(self.next_cursor, self.page_size)
+        self.loaded = True
+        page = display_entries(notes)
+        self.entries.extend(page)
+        return page
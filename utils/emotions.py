@@ -1,4 +1,5 @@
-import streamlit as st
+from utils.taxonomy import canonical_emotion
+
 
 def get_encouraging_sentence(emotion):
     """
@@ -26,68 +27,5 @@ def get_encouraging_sentence(emotion):
 
 
 def standardize_emotion_label(emotion):
-    # Define the mapping dictionary
-    emotion_mapping = {
-        'sad': 'Sadness',
-        'sadness': 'Sadness',
-        'Sad': 'Sadness',
-        'Sadness': 'Sadness',
-        '🥲 Sad': 'Sadness',
-        'anger': 'Anger',
-        'angry': 'Anger',
-        '😡 Anger': 'Anger',
-        'mad': 'Anger',
-        'rage': 'Anger',
-        'fear': 'Fear',
-        'afraid': 'Fear',
-        'scared': 'Fear',
-        '😱 Fear': 'Fear',
-        'love': 'Love',
-        '😍 Love': 'Love',
-        'affection': 'Love',
-        'joy': 'Joy',
-        'happy': 'Joy',
-        '😃 Joy': 'Joy',
-        'happiness': 'Joy',
-        'surprise': 'Surprise',
-        'shocked': 'Surprise',
-        '😯 Surprise': 'Surprise',
-        'disgust': 'Disgust',
-        'disgusted': 'Disgust',
-        '🤢 Disgust': 'Disgust',
-        'neutral': 'Neutral',
-        'calm': 'Neutral',
-        '😐 Neutral': 'Neutral'
-    }
-    
-    # Convert the input emotion to lowercase and find the standardized label
-    standardized_emotion = emotion_mapping.get(emotion.lower(), emotion)
-    return standardized_emotion
-
-def get_max_voted_emotion():
-    # Fetch the last classification results from each input type
-    video_emotion = st.session_state.get('video_last_clf')
-    text_emotion = st.session_state.get('text_last_clf')
-    audio_emotion = st.session_state.get('audio_last_clf')
-
-    # Combine all available emotions into a list
-    emotions = []
-    if video_emotion:
-        emotions.append(video_emotion)
-    if text_emotion:
-        emotions.append(text_emotion)
-    if audio_emotion:
-        emotions.append(audio_emotion)
-
-    # If no emotions were classified, return None or a default message
-    if not emotions:
-        return "No emotions detected."
-
-    # Count the occurrences of each emotion
-    from collections import Counter
-    emotion_counts = Counter(emotions)
-
-    # Get the most common emotion
-    max_voted_emotion = emotion_counts.most_common(1)[0][0]
-
-    return max_voted_emotion
\ No newline at end of file
+    """Canonical emotion name for a raw label ('sad', '🥲 Sad', 'Sadness'), or the label unchanged if unknown."""
+    return canonical_emotion(emotion) or emotion
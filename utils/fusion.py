@@ -0,0 +1,105 @@
+import math
+import os
+import time
+
+import numpy as np
+import streamlit as st
+
+from utils.taxonomy import EMOTIONS, emotion_code
+
+# How much each modality's prediction counts, overridable from the environment
+MODALITY_WEIGHTS = {
+    'text': float(os.getenv("FUSION__TEXT_WEIGHT", "1.0")),
+    'audio': float(os.getenv("FUSION__AUDIO_WEIGHT", "0.8")),
+    'video': float(os.getenv("FUSION__VIDEO_WEIGHT", "0.8")),
+}
+# Seconds after which a prediction counts half as much
+HALF_LIFE = float(os.getenv("FUSION__HALF_LIFE", "1800"))
+# Probability given to the label of modalities that return only a label (audio, video)
+LABEL_CONFIDENCE = 0.7
+
+NO_EMOTION = "No emotions detected."
+
+
+def confidence_vector(confs):
+    """Probability vector over EMOTIONS from a `{label: confidence}` prediction (any scale)."""
+    vector = np.zeros(len(EMOTIONS))
+    for label, confidence in confs.items():
+        code = emotion_code(label)
+        if code >= 0:
+            vector[code] += float(confidence)
+    total = vector.sum()
+    return vector / total if total > 0 else vector
+
+
+def label_vector(label, confidence=LABEL_CONFIDENCE):
+    """Probability vector for a bare label: `confidence` on it, the rest spread evenly over the others."""
+    code = emotion_code(label)
+    if code < 0:
+        return np.zeros(len(EMOTIONS))
+    vector = np.full(len(EMOTIONS), (1 - confidence) / (len(EMOTIONS) - 1))
+    vector[code] = confidence
+    return vector
+
+
+class EmotionFusion:
+    """
+    Confidence-weighted fusion of the text, audio and video predictions.
+
+    Keeps a running weighted sum of every prediction's probability vector and
+    of the weights, both decayed exponentially with `half_life`, so an update
+    or a read costs O(classes) however many predictions came before. The
+    fused distribution is their ratio, which sums to 1. The latest vector of
+    each modality is kept for display.
+    """
+
+    def __init__(self, weights=None, half_life=HALF_LIFE):
+        self.weights = dict(MODALITY_WEIGHTS, **(weights or {}))
+        self.rate = math.log(2) / half_life
+        self.latest = {}  # modality -> (vector, time)
+        self._sum = np.zeros(len(EMOTIONS))
+        self._weight = 0.0
+        self._time = None
+
+    def _decay(self, now):
+        return math.exp(-self.rate * (now - self._time)) if self._time is not None else 1.0
+
+    def update(self, modality, vector, now=None):
+        """Add a modality's probability vector to the fusion."""
+        now = time.monotonic() if now is None else now
+        if not vector.any():
+            return
+        decay = self._decay(now)
+        weight = self.weights.get(modality, 1.0)
+        self._sum = self._sum * decay + weight * vector
+        self._weight = self._weight * decay + weight
+        self._time = now
+        self.latest[modality] = (vector, now)
+
+    def distribution(self):
+        """Fused probability of each of EMOTIONS; all zeros before the first prediction."""
+        # The decay factor cancels out in the ratio, so no need to decay to the current time
+        return self._sum / self._weight if self._weight else self._sum.copy()
+
+    def top_emotions(self, k=1):
+        """The `k` most likely emotions, most likely first."""
+        if not self._weight:
+            return []
+        order = np.argsort(-self._sum, kind='stable')[:k]
+        return [EMOTIONS[i] for i in order]
+
+    def top_emotion(self):
+        return next(iter(self.top_emotions(1)), NO_EMOTION)
+
+
+def get_fusion():
+    """The session's fusion engine."""
+    return st.session_state.setdefault('emotion_fusion', EmotionFusion())
+
+
+def record_classification(modality, prediction):
+    """Add a classification (a `{label: confidence}` dict or a bare label) to the session's fusion."""
+    vector = confidence_vector(prediction) if isinstance(prediction, dict) else label_vector(prediction)
+    fusion = get_fusion()
+    fusion.update(modality, vector)
+    return fusion
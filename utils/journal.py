@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
+
+# Entries per classification request, parallel requests and most batches queued or in flight
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT__BATCH_SIZE", "16"))
+IMPORT_WORKERS = int(os.getenv("IMPORT__WORKERS", "4"))
+IMPORT_MAX_PENDING = int(os.getenv("IMPORT__MAX_PENDING", str(2 * IMPORT_WORKERS)))
+
+JOURNAL_TYPES = ["csv", "jsonl", "txt", "md"]
+
+# Column/key names recognised for an entry's text and date, in order of preference
+TEXT_FIELDS = ('text', 'entry', 'note', 'content', 'body', 'input_text')
+DATE_FIELDS = ('date_created', 'date', 'created', 'created_at', 'timestamp')
+
+# Format of `date_created` throughout the app and API
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+# Non-ISO dates accepted on import; numeric dates are read day first
+DATE_FORMATS = ('%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d.%m.%Y', '%d.%m.%Y %H:%M',
+                '%d-%m-%Y', '%d-%m-%Y %H:%M', '%Y/%m/%d', '%Y/%m/%d %H:%M', '%Y/%m/%d %H:%M:%S')
+
+_DATE_LINE = re.compile(r'^\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}([ T][\d:.+\-Z]+)?$')
+
+# API base URL -> whether it has /text_classification/batch
+_batch_supported = {}
+
+
+def parse_date(value):
+    """A journal date in the app's DATE_FORMAT (local time), or None if it can't be read."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value).strftime(DATE_FORMAT)
+        except (OverflowError, OSError, ValueError):
+            return None
+    value = str(value).strip()
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in DATE_FORMATS:
+            try:
+                date = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                pass
+        else:
+            return None
+    if date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+    return date.strftime(DATE_FORMAT)
+
+
+def _entry(record):
+    """
+    Journal entry from a CSV row or JSON object, or None if it has no text.
+
+    Raises ValueError if it has a date that can't be read.
+    """
+    text = next((record[k] for k in TEXT_FIELDS if record.get(k)), None)
+    if text is None and len(record) == 1:
+        text = next(iter(record.values()))
+    if not text or not str(text).strip():
+        return None
+    entry = {'text': str(text).strip()}
+    date = next((record[k] for k in DATE_FIELDS if record.get(k)), None)
+    if date:
+        entry['date_created'] = parse_date(date)
+        if entry['date_created'] is None:
+            raise ValueError(f"Unreadable date {date!r}")
+    return entry
+
+
+def _paragraphs(lines):
+    """Group non-blank lines into paragraphs, which are separated by blank lines."""
+    paragraph = []
+    for line in lines:
+        if line.strip():
+            paragraph.append(line.strip())
+            continue
+        if paragraph:
+            yield paragraph
+            paragraph = []
+    if paragraph:
+        yield paragraph
+
+
+def iter_entries(file, name, errors=None):
+    """
+    Stream `{'text', 'date_created'?}` entries from a CSV, JSONL or plain-text journal.
+
+    `file` is a binary file object; it is read line by line, never as a whole.
+    Dates are stored in DATE_FORMAT. A CSV row or JSONL line that isn't valid
+    or has an unreadable date is skipped and its line number added to the
+    `errors` list; without one, it raises ValueError. In text journals, a
+    first line that isn't a readable date is part of the text.
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        kind = os.path.splitext(name)[1].lower().lstrip('.')
+        if kind == 'csv':
+            reader = csv.DictReader(text)
+            for row in reader:
+                try:
+                    entry = _entry({(k or '').strip().lower(): v for k, v in row.items()})
+                except ValueError:
+                    if errors is None:
+                        raise
+                    errors.append(reader.line_num)
+                    continue
+                if entry:
+                    yield entry
+        elif kind == 'jsonl':
+            for number, line in enumerate(text, start=1):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                        entry = _entry(record if isinstance(record, dict) else {'text': record})
+                    except ValueError:
+                        if errors is None:
+                            raise
+                        errors.append(number)
+                        continue
+                    if entry:
+                        yield entry
+        else:
+            # A first line holding only a date dates the entry
+            for paragraph in _paragraphs(text):
+                entry = {'text': ' '.join(paragraph)}
+                date = parse_date(paragraph[0]) if len(paragraph) > 1 and _DATE_LINE.match(paragraph[0]) else None
+                if date is not None:
+                    entry = {'text': ' '.join(paragraph[1:]), 'date_created': date}
+                yield entry
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def iter_batches(items, size=IMPORT_BATCH_SIZE):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def classify_batch(client, email, model_select, entries, since=None):
+    """
+    Classify and store a batch of entries.
+
+    Uses `/text_classification/batch` when the API has it, else one
+    `/text_classification` call per entry. Returns `(notes_delta, errors)`,
+    where `notes_delta` holds at least the notes created for the batch.
+    """
+    if _batch_supported.get(client.base_url, True):
+        response = client.post("/text_classification/batch",
+                               json={'email': email, 'model_select': model_select, 'entries': entries})
+        if response.status_code != 404:
+            response.raise_for_status()
+            return {'notes': response.json()['notes']}, 0
+        _batch_supported[client.base_url] = False
+
+    notes, errors = [], 0
+    for entry in entries:
+        data = {'input_text': entry['text'], 'model_select': model_select, 'email': email, 'since': since}
+        if 'date_created' in entry:
+            data['date_created'] = entry['date_created']
+        try:
+            response = client.post("/text_classification", data=data)
+            response.raise_for_status()
+        except Exception:
+            errors += 1
+            continue
+        body = response.json()
+        if 'notes_delta' in body:
+            # Ask the next call only for notes after this one
+            notes.extend(body['notes_delta']['notes'])
+            since = body['notes_delta'].get('version', since)
+        else:
+            notes = body['user_data'].get('notes', [])
+    return {'notes': notes}, errors
+
+
+def classify_batches(classify, batches, workers=IMPORT_WORKERS, max_pending=IMPORT_MAX_PENDING):
+    """
+    Run `classify(batch)` over `batches` on a pool of `workers` threads, yielding
+    `(batch, result, error)` as each batch finishes.
+
+    At most `max_pending` batches are submitted and not yet consumed, so a large
+    journal is read only as fast as it is classified. A failing batch is
+    yielded with its exception and the others carry on.
+    """
+    def finished(futures):
+        for future in futures:
+            batch = pending.pop(future)
+            error = future.exception()
+            yield batch, (None if error else future.result()), error
+
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="journal-import") as pool:
+        for batch in batches:
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+            pending[pool.submit(classify, batch)] = batch
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finished(done)
@@ -0,0 +1,179 @@
+SOI = b'\xff\xd8'  # JPEG start of image
+EOI = b'\xff\xd9'  # JPEG end of image
+HEADER_END = b'\r\n\r\n'
+
+# Compact the buffer once this many consumed bytes sit in front of the read offset
+COMPACT_THRESHOLD = 256 * 1024
+
+
+def parse_boundary(content_type):
+    """Extract the part boundary from a multipart/x-mixed-replace Content-Type header."""
+    for param in (content_type or '').split(';')[1:]:
+        key, _, value = param.strip().partition('=')
+        if key.lower() == 'boundary':
+            return value.strip('"')
+    return None
+
+
+class MjpegDemuxer:
+    """
+    Incremental demuxer that splits an MJPEG byte stream into JPEG frames.
+
+    Data is appended to a single bytearray and consumed through a moving read
+    offset, so each byte is scanned once regardless of frame size. With a
+    `boundary`, part headers are parsed and a part ends after its
+    Content-Length or, without one, at the next `\r\n--boundary`, so a frame
+    is only complete once the next part starts. Without a boundary, frames are
+    delimited by the JPEG SOI/EOI markers, and anything before an SOI (such as
+    a stray EOI) is skipped; a JPEG with an embedded thumbnail has an EOI of
+    its own, so that mode is only a fallback.
+    """
+
+    def __init__(self, boundary=None):
+        self.boundary = boundary
+        self.frames = 0
+        self.bytes_in = 0
+        self.bytes_copied = 0  # bytes moved in user space: appends, compactions and emitted frames
+
+        self._buf = bytearray()
+        self._start = 0  # read offset of unconsumed data
+        self._scan = 0  # where the next marker search resumes
+        self._in_body = boundary is None
+        self._delimiter = b'\r\n--' + boundary.encode('latin-1') if boundary is not None else None
+        self._length = None  # Content-Length of the current part, if known
+        self._in_frame = False  # an SOI was found at the read offset
+
+    def feed(self, chunk):
+        """Append `chunk` and return the list of frames it completed."""
+        self._buf += chunk
+        self.bytes_in += len(chunk)
+        self.bytes_copied += len(chunk)
+
+        frames = []
+        while (frame := self._next_frame()) is not None:
+            frames.append(frame)
+        self._compact()
+        return frames
+
+    def _next_frame(self):
+        buf = self._buf
+        if not self._in_body:
+            end = buf.find(HEADER_END, self._scan)
+            if end == -1:
+                self._scan = max(self._start, len(buf) - len(HEADER_END) + 1)
+                return None
+            self._length = None
+            for line in buf[self._start:end].split(b'\r\n'):
+                name, _, value = line.partition(b':')
+                if name.strip().lower() == b'content-length' and value.strip().isdigit():
+                    self._length = int(value)
+            self._start = self._scan = end + len(HEADER_END)
+            self._in_body = True
+
+        if self._length is not None:
+            if len(buf) - self._start < self._length:
+                return None
+            return self._emit(self._start, self._start + self._length)
+
+        if self._delimiter is not None:
+            end = buf.find(self._delimiter, self._scan)
+            if end == -1:
+                # Resume where a delimiter split across chunks could start
+                self._scan = max(self._start, len(buf) - len(self._delimiter) + 1)
+                return None
+            return self._emit(self._start, end)
+
+        if not self._in_frame:
+            soi = buf.find(SOI, self._scan)
+            if soi == -1:
+                # Drop everything but a possible trailing 0xff of a split marker
+                self._start = self._scan = max(self._start, len(buf) - 1)
+                return None
+            self._start = soi
+            self._in_frame = True
+            self._scan = soi + len(SOI)
+
+        eoi = buf.find(EOI, self._scan)
+        if eoi == -1:
+            self._scan = max(self._scan, len(buf) - 1)
+            return None
+        self._in_frame = False
+        return self._emit(self._start, eoi + len(EOI))
+
+    def _emit(self, start, end):
+        # Copy the frame out exactly once; the memoryview is released before the buffer grows again
+        with memoryview(self._buf) as view:
+            frame = bytes(view[start:end])
+        self._start = self._scan = end
+        self.frames += 1
+        self.bytes_copied += len(frame)
+        if self.boundary is not None:
+            self._in_body = False
+        return frame
+
+    def _compact(self):
+        if self._start < COMPACT_THRESHOLD or self._start < len(self._buf) // 2:
+            return
+        self.bytes_copied += len(self._buf) - self._start
+        del self._buf[:self._start]
+        self._scan -= self._start
+        self._start = 0
+
+
+def iter_frames(chunks, boundary=None):
+    """Yield JPEG frames from an iterable of byte chunks."""
+    demuxer = MjpegDemuxer(boundary)
+    for chunk in chunks:
+        yield from demuxer.feed(chunk)
+
+
+class FramePacer:
+    """
+    Adaptive frame-rate limit for rendering a live feed.
+
+    Frames are due on a fixed schedule, one `interval` apart, rather than an
+    interval after the last render: a tick up to `tolerance` of an interval
+    early still renders, so jitter in the fragment's `run_every` ticks doesn't
+    make it wait for the next one. The interval starts at `1 / max_fps`; when
+    a fragment run takes longer than that period, the session can't keep up,
+    so the interval backs off by `backoff` (up to `max_interval`), and it
+    recovers by `recovery` per run that fits.
+    """
+
+    def __init__(self, max_fps=15, tolerance=0.5, backoff=1.5, recovery=0.9, max_interval=1.0):
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.recovery = recovery
+        self.max_interval = max_interval
+        self.min_interval = None
+        self.set_max_fps(max_fps)
+        self.rendered_frames = 0
+        self.dropped_frames = 0
+        self._next_due = float('-inf')
+
+    def set_max_fps(self, max_fps):
+        """Change the frame-rate cap, e.g. when the user moves the slider; a new cap starts without back-off."""
+        if 1.0 / max_fps != self.min_interval:
+            self.min_interval = self.interval = 1.0 / max_fps
+
+    @property
+    def fps(self):
+        """The frame rate currently aimed for."""
+        return 1.0 / self.interval
+
+    def ready(self, now):
+        """Return True if a frame arriving at `now` should be rendered."""
+        if now >= self._next_due - self.tolerance * self.interval:
+            return True
+        self.dropped_frames += 1
+        return False
+
+    def rendered(self, now, seconds=0.0):
+        """Record a frame rendered at `now` (perf_counter seconds) by a fragment run that took `seconds`."""
+        if seconds > self.min_interval:
+            self.interval = min(self.interval * self.backoff, max(self.max_interval, self.min_interval))
+        else:
+            self.interval = max(self.interval * self.recovery, self.min_interval)
+        # Stay on schedule, but don't make up for frames a stall has already missed
+        self._next_due = max(self._next_due + self.interval, now + (1 - self.tolerance) * self.interval)
+        self.rendered_frames += 1
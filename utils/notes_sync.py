@@ -0,0 +1,127 @@
+import time
+
+import streamlit as st
+
+# Seconds between conditional checks for notes changed elsewhere
+SYNC_INTERVAL = 30.0
+
+
+def note_id(note):
+    """Key a note by its API id, or by its date and text for notes without one."""
+    # Id 0 is a valid id
+    return note['id'] if note.get('id') is not None else (note.get('date_created'), note.get('text'))
+
+
+class NotesStore:
+    """
+    Local copy of a user's notes, kept current with deltas from the API.
+
+    The API sends `{'version', 'notes', 'removed'}` deltas holding only the notes
+    added or changed since the version the client last saw. `check` asks for
+    changes made elsewhere with If-None-Match, so an unchanged diary costs one
+    304 response with no body. Without a version from the API the store falls
+    back to receiving the full notes list.
+    """
+
+    def __init__(self, email, notes=(), version=None):
+        self.email = email
+        self.supported = True  # cleared if the API has no /notes/changes endpoint
+        self.reset(notes, version)
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.get('email'), user.get('notes') or [], user.get('notes_version'))
+
+    @property
+    def notes(self):
+        return self._notes
+
+    def reset(self, notes, version=None):
+        self._notes = list(notes or [])
+        self._index = {note_id(note): i for i, note in enumerate(self._notes)}
+        self.version = version
+        self.etag = None
+        self._checked = time.monotonic()
+
+    def apply(self, delta):
+        """Apply a delta; return True if existing notes changed, False if notes were only appended."""
+        changed = False
+        for note in delta.get('notes', []):
+            key = note_id(note)
+            if key in self._index:
+                self._notes[self._index[key]] = note
+                changed = True
+            else:
+                self._index[key] = len(self._notes)
+                self._notes.append(note)
+
+        removed = set(delta.get('removed') or [])
+        if removed:
+            self._notes = [note for note in self._notes if note_id(note) not in removed]
+            self._index = {note_id(note): i for i, note in enumerate(self._notes)}
+            changed = True
+
+        self.version = delta.get('version', self.version)
+        self.etag = delta.get('etag', self.etag)
+        return changed
+
+    def due(self):
+        return (self.supported and self.version is not None
+                and time.monotonic() - self._checked >= SYNC_INTERVAL)
+
+    def check(self, client):
+        """
+        Fetch notes changed since our version, if any.
+
+        Returns None when nothing changed, otherwise the result of `apply`.
+        """
+        self._checked = time.monotonic()
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        response = client.get("/notes/changes", params={'email': self.email, 'since': self.version}, headers=headers)
+        if response.status_code == 304:
+            return None
+        if response.status_code == 404:
+            self.supported = False
+            return None
+        response.raise_for_status()
+        delta = response.json()
+        delta.setdefault('etag', response.headers.get('ETag'))
+        return self.apply(delta)
+
+
+def get_notes_store():
+    """Return the session's notes store, recreating it when another user signed in."""
+    user = st.session_state['user']
+    store = st.session_state.get('notes_store')
+    if store is None or store.email != user.get('email'):
+        store = NotesStore.from_user(user)
+        st.session_state['notes_store'] = store
+    return store
+
+
+def _publish(store, rebuilt):
+    """Point the session's user record at the store's notes and invalidate views that can't follow edits."""
+    st.session_state['user']['notes'] = store.notes
+    if rebuilt and 'emotion_timeline' in st.session_state:
+        st.session_state['emotion_timeline'].invalidate()
+
+
+def merge_user_update(response):
+    """Apply the notes that came back with a classification: a delta if the API sent one, else the full record."""
+    if 'notes_delta' in response:
+        store = get_notes_store()
+        _publish(store, store.apply(response['notes_delta']))
+    else:
+        st.session_state['user'] = response['user_data']
+        store = get_notes_store()
+        store.reset(response['user_data'].get('notes'), response['user_data'].get('notes_version'))
+        _publish(store, True)
+
+
+def refresh_notes(client, force=False):
+    """Pick up notes changed elsewhere, at most every SYNC_INTERVAL seconds unless `force`d."""
+    store = get_notes_store()
+    if store.due() or (force and store.supported and store.version is not None):
+        changed = store.check(client)
+        if changed is not None:
+            _publish(store, changed)
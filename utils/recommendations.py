@@ -0,0 +1,280 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils.emotions import standardize_emotion_label
+from utils.session import require_user
+
+# Cache limits, overridable from the environment
+RECOMMENDATION_TTL = float(os.getenv("RECOMMENDATION__TTL", "900"))
+RECOMMENDATION_MAX_ENTRIES = int(os.getenv("RECOMMENDATION__MAX_ENTRIES", "1024"))
+RECOMMENDATION_MAX_BYTES = int(os.getenv("RECOMMENDATION__MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Speculative prefetch: emotions warmed per classification, worker threads and most requests in flight
+PREFETCH_TOP_K = int(os.getenv("RECOMMENDATION__PREFETCH_TOP_K", "2"))
+PREFETCH_WORKERS = int(os.getenv("RECOMMENDATION__PREFETCH_WORKERS", "2"))
+PREFETCH_MAX_PENDING = int(os.getenv("RECOMMENDATION__PREFETCH_MAX_PENDING", "8"))
+
+# User record fields that are not part of the profile the recommendation depends on
+NON_PROFILE_FIELDS = ('notes', 'notes_version')
+
+
+def profile_fields(user):
+    return {k: v for k, v in user.items() if k not in NON_PROFILE_FIELDS}
+
+
+def canonical_profile(user):
+    """The user's profile fields as compact JSON with sorted keys, the same bytes for the same profile."""
+    return json.dumps(profile_fields(user), sort_keys=True, separators=(',', ':'), default=str).encode()
+
+
+def profile_digest(user):
+    """Stable hash of the user's profile fields, independent of key order and of their diary."""
+    return hashlib.sha256(canonical_profile(user)).hexdigest()
+
+
+class RecommendationCache:
+    """
+    Thread-safe LRU of recommendations with a TTL and a memory cap.
+
+    Entries are evicted least recently used first once there are more than
+    `max_entries` of them or their JSON size adds up to more than `max_bytes`.
+    """
+
+    def __init__(self, ttl=RECOMMENDATION_TTL, max_entries=RECOMMENDATION_MAX_ENTRIES, max_bytes=RECOMMENDATION_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Whether `key` has a live entry, without touching the counters or LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        """Return the cached value for `key`, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return a snapshot of the hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'evictions': self.evictions, 'expirations': self.expirations,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+
+@st.cache_resource(show_spinner=False)
+def get_recommendation_cache():
+    """Process-wide cache, so every session of the same user shares its entries."""
+    return RecommendationCache()
+
+
+def recommendation_key(user, emotion):
+    return profile_digest(user), standardize_emotion_label(emotion)
+
+
+class ProfileRegistry:
+    """
+    Content-addressed profiles for `/recommend`.
+
+    The profile is uploaded once, gzip-compressed, to `/profiles`, which
+    answers with its digest; later recommendations send only that digest. A
+    404 or 410 from `/recommend` means the API no longer has the profile, so it
+    is uploaded again. APIs without `/profiles` get the whole user record as
+    before.
+    """
+
+    def __init__(self):
+        self._digests = {}  # (base_url, local digest) -> digest returned by the API
+        self._lock = threading.Lock()
+        self.supported = {}  # base_url -> whether the API has /profiles
+        self.uploads = 0
+
+    def upload(self, client, user):
+        """Upload the profile of `user` and return its digest, or None if the API has no `/profiles`."""
+        response = client.post("/profiles", data=gzip.compress(canonical_profile(user)),
+                               headers={'Content-Type': "application/json", 'Content-Encoding': "gzip"})
+        if response.status_code in (404, 405):
+            self.supported[client.base_url] = False
+            return None
+        response.raise_for_status()
+        digest = response.json()['digest']
+        with self._lock:
+            self._digests[client.base_url, profile_digest(user)] = digest
+            self.supported[client.base_url] = True
+            self.uploads += 1
+        return digest
+
+    def recommend(self, client, user, emotion):
+        """Return the API's recommendation; raises requests.HTTPError if it does not answer with one."""
+        if self.supported.get(client.base_url, True):
+            digest = self._digests.get((client.base_url, profile_digest(user))) or self.upload(client, user)
+            if digest is not None:
+                response = client.post("/recommend", params={'emotion': emotion, 'profile': digest})
+                if response.status_code in (404, 410):
+                    digest = self.upload(client, user)
+                    response = digest and client.post("/recommend", params={'emotion': emotion, 'profile': digest})
+                if response is not None:
+                    response.raise_for_status()
+                    return response.json()
+
+        response = client.post("/recommend", json=user, params={'emotion': emotion})
+        response.raise_for_status()
+        return response.json()
+
+
+@st.cache_resource(show_spinner=False)
+def get_profile_registry():
+    """Process-wide registry of the profiles uploaded to each API."""
+    return ProfileRegistry()
+
+
+def request_recommendation(client, user, emotion):
+    """Ask the API for a recommendation; raises requests.HTTPError if it does not answer with one."""
+    return get_profile_registry().recommend(client, user, emotion)
+
+
+class RecommendationPrefetcher:
+    """
+    Warms the recommendation cache on a small bounded pool.
+
+    Requests for keys already cached or in flight are skipped, and so is
+    everything beyond `max_pending` outstanding requests, so a burst of
+    classifications never queues more work than the pool can finish.
+    """
+
+    def __init__(self, cache, registry, max_workers=PREFETCH_WORKERS, max_pending=PREFETCH_MAX_PENDING):
+        self.cache = cache
+        self.registry = registry
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recommendation-prefetch")
+        self._inflight = {}  # key -> future
+        self._lock = threading.Lock()
+        self.submitted = self.skipped = self.failed = 0
+
+    def _fetch(self, client, user, key):
+        try:
+            self.cache.put(key, self.registry.recommend(client, user, key[1]))
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def submit(self, client, user, emotions):
+        """Start fetching the recommendations of `user` for each of `emotions` not cached yet."""
+        for emotion in emotions:
+            key = recommendation_key(user, emotion)
+            with self._lock:
+                if key in self._inflight or key in self.cache or len(self._inflight) >= self.max_pending:
+                    self.skipped += 1
+                    continue
+                self._inflight[key] = self._pool.submit(self._fetch, client, user, key)
+                self.submitted += 1
+
+    def wait(self, key, timeout=None):
+        """Wait for an in-flight prefetch of `key`; return True if there was one and it succeeded."""
+        with self._lock:
+            future = self._inflight.get(key)
+        if future is None:
+            return False
+        try:
+            future.result(timeout)
+            return True
+        except Exception:
+            return False
+
+
+@st.cache_resource(show_spinner=False)
+def get_prefetcher():
+    """Process-wide prefetcher filling the shared recommendation cache."""
+    return RecommendationPrefetcher(get_recommendation_cache(), get_profile_registry())
+
+
+def top_emotions(confs, k=PREFETCH_TOP_K):
+    """The `k` most confident labels of a `{label: confidence}` prediction."""
+    return sorted(confs, key=confs.get, reverse=True)[:k]
+
+
+def prefetch_recommendations(client, emotions):
+    """
+    Warm the recommendations of the signed-in user for `emotions` in the background.
+
+    Skipped while the profile is still being downloaded, since the cache is
+    keyed by the full profile.
+    """
+    hydration = st.session_state.get('user_hydration')
+    if hydration is not None and not hydration.done():
+        return
+    get_prefetcher().submit(client, require_user(), emotions)
+
+
+def fetch_recommendation(client, user, emotion, cache=None, prefetcher=None):
+    """
+    Return the recommendation for `user` feeling `emotion`, from `cache` when possible.
+
+    A prefetch already in flight for the same key is waited on rather than
+    duplicated. Raises requests.HTTPError if the API does not answer with a
+    recommendation.
+    """
+    if cache is None:
+        cache = get_recommendation_cache()
+    key = recommendation_key(user, emotion)
+    result = cache.get(key)
+    if result is None and (prefetcher or get_prefetcher()).wait(key):
+        result = cache.get(key)
+    if result is None:
+        result = request_recommendation(client, user, key[1])
+        cache.put(key, result)
+    return result
@@ -0,0 +1,67 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Run durations kept per part of a page
+RERUN_HISTORY = 50
+
+WHOLE_PAGE = "Whole page"
+
+
+class RerunTimings:
+    """Recent run durations of a page and of each of its fragments."""
+
+    def __init__(self, history=RERUN_HISTORY):
+        self.history = history
+        self._runs = {}  # part -> deque of (seconds, ran alone)
+
+    def record(self, part, seconds, alone=False):
+        """Record a run of `part`; `alone` if it was a fragment rerun rather than part of a whole-page run."""
+        self._runs.setdefault(part, deque(maxlen=self.history)).append((seconds, alone))
+
+    def stats(self):
+        """Return the run count and the last and mean duration in seconds per part, split by how it ran."""
+        stats = {}
+        for part, runs in self._runs.items():
+            for alone in (False, True):
+                seconds = [s for s, a in runs if a == alone]
+                if seconds:
+                    stats[(part, alone)] = {'runs': len(seconds), 'last_s': seconds[-1],
+                                            'mean_s': sum(seconds) / len(seconds)}
+        return stats
+
+
+def get_rerun_timings(page):
+    """The session's run timings for `page`."""
+    return st.session_state.setdefault(f'rerun_timings_{page}', RerunTimings())
+
+
+def in_fragment_rerun():
+    """Whether the current script run reruns only fragments."""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+@contextmanager
+def timed(timings, part):
+    """Record how long the block takes as a run of `part`, even if it ends in st.rerun()."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(part, time.perf_counter() - start, alone=in_fragment_rerun())
+
+
+def timed_fragment(timings, part):
+    """`st.experimental_fragment` that records each of its runs in `timings` as `part`."""
+    def decorate(func):
+        @wraps(func)
+        def run(*args, **kwargs):
+            with timed(timings, part):
+                return func(*args, **kwargs)
+        return st.experimental_fragment(run)
+    return decorate
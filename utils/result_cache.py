@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+from utils.spool import SPOOL_DIR
+
+# Classification results kept for files seen before, overridable from the environment
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE__PATH", os.path.join(SPOOL_DIR, "results.sqlite3"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE__MAX_ENTRIES", "5000"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE__MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Bytes hashed per update, so hashing a large upload never needs a second copy of it
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(buffer, chunk_size=HASH_CHUNK_SIZE):
+    """BLAKE2b digest of an in-memory upload, fed through memoryview slices without copying it."""
+    digest = hashlib.blake2b(digest_size=20)
+    view = memoryview(buffer).cast('B')
+    for offset in range(0, view.nbytes, chunk_size):
+        digest.update(view[offset:offset + chunk_size])
+    return digest.hexdigest()
+
+
+def result_key(buffer, kind, mode=""):
+    """Cache key for classifying `buffer` as `kind` ('audio', 'video') with the given processing `mode`."""
+    return f"{kind}:{mode}:{content_hash(buffer)}"
+
+
+class ResultCache:
+    """
+    Classification results by upload content, in SQLite.
+
+    Values are stored as JSON. Least recently used entries are evicted once
+    there are more than `max_entries` or their size adds up to more than
+    `max_bytes`. Safe to share between threads.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_entries=RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                         "(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        """Return the cached result for `key`, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, value):
+        value = json.dumps(value)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                             (key, value, len(value), time.time()))
+            count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            if count > self.max_entries or size > self.max_bytes:
+                self._evict(count, size)
+
+    def _evict(self, count, size):
+        rows = self._db.execute("SELECT key, size FROM results ORDER BY accessed").fetchall()
+        evicted = []
+        for key, entry_size in rows:
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            size -= entry_size
+        self._db.executemany("DELETE FROM results WHERE key = ?", evicted)
+
+    def stats(self):
+        with self._lock:
+            count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'entries': count, 'bytes': size}
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    """Process-wide result cache shared by every session."""
+    return ResultCache()
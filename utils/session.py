@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+
+@st.cache_resource(show_spinner=False)
+def get_hydration_pool():
+    """Process-wide pool that downloads signed-in users' profiles in the background."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="profile-hydration")
+
+
+def fetch_profile(client, email):
+    """Download the full user record: profile fields and diary notes."""
+    response = client.get("/profile", params={'email': email})
+    response.raise_for_status()
+    return response.json()['user_data']
+
+
+def sign_in(user_data, client):
+    """
+    Store the signed-in user and, if the API only sent the identity, start
+    downloading the rest of the profile in the background.
+    """
+    st.session_state['authenticated'] = True
+    st.session_state['user'] = user_data
+    st.session_state.pop('user_hydration', None)
+    if 'notes' not in user_data:
+        st.session_state['user_hydration'] = get_hydration_pool().submit(fetch_profile, client, user_data['email'])
+
+
+def require_user():
+    """Return the full user record, waiting for background hydration to finish if it has not yet."""
+    hydration = st.session_state.get('user_hydration')
+    if hydration is not None:
+        try:
+            with st.spinner("Loading your profile..."):
+                profile = hydration.result()
+            st.session_state['user'] = {**st.session_state['user'], **profile}
+        except Exception as e:
+            st.error(f"Could not load your profile: {e}")
+            st.session_state['user'].setdefault('notes', [])
+        del st.session_state['user_hydration']
+    return st.session_state['user']
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Where uploads are spooled to disk when a library needs a file path, overridable from the environment
+SPOOL_DIR = os.getenv("SPOOL__DIR", os.path.join(tempfile.gettempdir(), "moodmate_spool"))
+SPOOL_MAX_BYTES = int(os.getenv("SPOOL__MAX_BYTES", str(1024 * 1024 * 1024)))
+# Spooled files older than this many seconds are left over from crashed runs and purged
+SPOOL_MAX_AGE = float(os.getenv("SPOOL__MAX_AGE", "3600"))
+
+SPOOL_PREFIX = "spool-"
+
+
+class Spool:
+    """
+    One managed directory for the temporary files uploads need.
+
+    Files are deleted as soon as their `file()` block ends. Anything left
+    behind by an interrupted run is purged once it is older than `max_age`, or
+    oldest first once the directory holds more than `max_bytes`. Files in use
+    are never purged.
+    """
+
+    def __init__(self, directory=SPOOL_DIR, max_bytes=SPOOL_MAX_BYTES, max_age=SPOOL_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._in_use = set()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.purge()
+
+    def _files(self):
+        with os.scandir(self.directory) as entries:
+            return [(entry.path, entry.stat()) for entry in entries
+                    if entry.name.startswith(SPOOL_PREFIX) and entry.is_file()]
+
+    def purge(self, reserve=0):
+        """Delete stale files, then the oldest ones until `reserve` more bytes fit under `max_bytes`."""
+        with self._lock:
+            files = sorted((stat.st_mtime, stat.st_size, path) for path, stat in self._files()
+                           if path not in self._in_use)
+            in_use_bytes = sum(os.path.getsize(path) for path in self._in_use if os.path.exists(path))
+            total = in_use_bytes + sum(size for _, size, _ in files)
+            cutoff = time.time() - self.max_age
+            for mtime, size, path in files:
+                if mtime >= cutoff and total + reserve <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    def usage(self):
+        """Return the number and total size of the spooled files."""
+        files = self._files()
+        return len(files), sum(stat.st_size for _, stat in files)
+
+    @contextmanager
+    def file(self, data, suffix=""):
+        """Write `data` (bytes or a buffer) to a spooled file and yield its path; it is deleted afterwards."""
+        self.purge(reserve=memoryview(data).nbytes)
+        path = os.path.join(self.directory, f"{SPOOL_PREFIX}{uuid.uuid4().hex}{suffix}")
+        with self._lock:
+            self._in_use.add(path)
+        try:
+            with open(path, 'wb') as f:
+                f.write(data)
+            yield path
+        finally:
+            with self._lock:
+                self._in_use.discard(path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+@st.cache_resource(show_spinner=False)
+def get_spool():
+    """Process-wide spool shared by every session."""
+    return Spool()
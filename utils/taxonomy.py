@@ -0,0 +1,114 @@
+import re
+
+# Canonical emotions; their position is the emotion's categorical code
+EMOTIONS = ('Anger', 'Fear', 'Sadness', 'Joy', 'Love', 'Surprise', 'Disgust', 'Neutral')
+
+# Chart/display label for each canonical emotion, in y-axis order
+EMOTION_LABELS = {
+    'Anger': 'Anger 😡',
+    'Fear': 'Fear 😱',
+    'Sadness': 'Sadness 🥺',
+    'Joy': 'Joy 😃',
+    'Love': 'Love 😍',
+    'Surprise': 'Surprise 😯',
+    'Disgust': 'Disgust 🤮',
+    'Neutral': 'Neutral 😐'
+}
+
+# Emotions the text classifier predicts, in the order its results are listed
+TEXT_EMOTIONS = ('Sadness', 'Joy', 'Love', 'Anger', 'Fear', 'Surprise')
+
+# Words (case-insensitive, emoji and punctuation ignored) that mean each emotion
+SYNONYMS = {
+    'Anger': ('anger', 'angry', 'mad', 'rage'),
+    'Fear': ('fear', 'afraid', 'scared'),
+    'Sadness': ('sad', 'sadness'),
+    'Joy': ('joy', 'happy', 'happiness'),
+    'Love': ('love', 'affection'),
+    'Surprise': ('surprise', 'shocked'),
+    'Disgust': ('disgust', 'disgusted'),
+    'Neutral': ('neutral', 'calm'),
+}
+
+_NOT_LETTERS = re.compile(r'[^a-z]+')
+
+
+def _word(label):
+    """Reduce a raw label to its lowercase words, e.g. '🥲 Sad' -> 'sad'."""
+    return _NOT_LETTERS.sub(' ', label.casefold()).strip()
+
+
+# Word -> code, built once
+_WORD_CODES = {word: EMOTIONS.index(emotion) for emotion, words in SYNONYMS.items() for word in words}
+
+def _spellings():
+    """The spellings of each emotion the API and pages use: 'sad', 'Sad', 'SAD', '🥺 Sad', 'Sadness 🥺'..."""
+    for code, (emotion, display) in enumerate(EMOTION_LABELS.items()):
+        emoji = display.split()[-1]
+        for word in SYNONYMS[emotion] + (emotion,):
+            for form in (word, word.lower(), word.capitalize(), word.upper(), f"{emoji} {word.capitalize()}"):
+                yield form, code
+        yield display, code
+
+
+# Raw label -> code, seeded with the known spellings so the common case is one dict lookup;
+# other labels are added as they are seen, up to _MAX_CACHED
+_CODES = dict(_spellings())
+_MAX_CACHED = len(_CODES) + 4096
+
+
+def emotion_code(label):
+    """Categorical code of a raw label (e.g. 'sad', 'Sadness', '🥲 Sad'), or -1 if it is not an emotion."""
+    code = _CODES.get(label)
+    if code is None:
+        code = _WORD_CODES.get(_word(label), -1) if isinstance(label, str) else -1
+        if isinstance(label, str) and len(_CODES) < _MAX_CACHED:
+            _CODES[label] = code
+    return code
+
+
+def canonical_emotion(label):
+    """Canonical name of a raw label, or None if it is not an emotion."""
+    code = emotion_code(label)
+    return EMOTIONS[code] if code >= 0 else None
+
+
+def emotion_codes(labels):
+    """
+    Vectorized `emotion_code` over a sequence, `pd.Series` or NumPy array of labels.
+
+    Each distinct label is resolved once, so the cost is one factorize over
+    the input plus a lookup per distinct label. Missing labels get -1.
+    """
+    # pandas is only needed by the vectorized helpers; pages that just map single labels never load it
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
+    # Code -1 (missing label) picks the trailing -1
+    lookup = np.array([emotion_code(u) for u in uniques] + [-1], dtype=np.int8)
+    return lookup[codes]
+
+
+def emotion_categorical(labels, display=False):
+    """Labels as a `pd.Categorical` over EMOTIONS (or their display labels); unknown labels become NaN."""
+    import pandas as pd
+
+    categories = list(EMOTION_LABELS.values()) if display else list(EMOTIONS)
+    return pd.Categorical.from_codes(emotion_codes(labels), categories=categories)
+
+
+def standardize_labels(labels):
+    """Canonical names for an array of labels, keeping unknown labels as they are (missing stays None)."""
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
+    lookup = np.array([canonical_emotion(u) or u for u in uniques] + [None], dtype=object)
+    return lookup[codes]
+
+
+def display_label(label):
+    """Display label ('Joy 😃') for a raw label, or the label itself if it is not an emotion."""
+    emotion = canonical_emotion(label)
+    return EMOTION_LABELS[emotion] if emotion else label
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from utils.taxonomy import emotion_categorical, standardize_labels
+
+COLUMNS = ['date_created', 'emotion', 'emotion_label', 'text']
+
+
+def notes_frame(notes):
+    """Build the timeline rows for `notes` with vectorized parsing and label lookups."""
+    df = pd.DataFrame.from_records(notes, columns=['date_created', 'emotion', 'text'])
+    # A date that can't be read becomes NaT rather than breaking the whole page
+    df['date_created'] = pd.to_datetime(df['date_created'], format='ISO8601', errors='coerce')
+    df['emotion'] = standardize_labels(df['emotion'])
+    df['emotion_label'] = emotion_categorical(df['emotion'], display=True)
+    return df[COLUMNS]
+
+
+class EmotionTimeline:
+    """
+    A user's notes as a DataFrame sorted by date, kept in sync incrementally.
+
+    `sync` compares the note count and the last note against what it saw before,
+    so an unchanged diary costs O(1) and new notes appended by the API are parsed
+    on their own instead of rebuilding the whole frame. Any other change (another
+    user, a shorter list) triggers a full rebuild. `version` increases on every
+    change, which makes it a cheap cache key for anything derived from the frame.
+    """
+
+    def __init__(self):
+        self.frame = notes_frame([])
+        self.version = 0
+        self._count = 0
+        self._last_key = None
+
+    @staticmethod
+    def _key(note):
+        return note.get('date_created'), note.get('emotion'), note.get('text')
+
+    def sync(self, notes):
+        """Bring the frame up to date with `notes`; return True if it changed."""
+        notes = notes or []
+        count = len(notes)
+        last_key = self._key(notes[-1]) if notes else None
+        if count == self._count and last_key == self._last_key:
+            return False
+
+        if count > self._count > 0 and self._key(notes[self._count - 1]) == self._last_key:
+            self._append(notes[self._count:])
+        else:
+            self.frame = notes_frame(notes).sort_values(by='date_created', kind='stable', ignore_index=True)
+
+        self._count = count
+        self._last_key = last_key
+        self.version += 1
+        return True
+
+    def invalidate(self):
+        """Force a full rebuild on the next sync, for changes to notes other than appends."""
+        self._count = 0
+        self._last_key = None
+
+    def _append(self, notes):
+        new = notes_frame(notes).sort_values(by='date_created', kind='stable')
+        frame = pd.concat([self.frame, new], ignore_index=True)
+        # New notes normally come last in time; only re-sort when they do not
+        if len(self.frame) and len(new) and new['date_created'].iloc[0] < self.frame['date_created'].iloc[-1]:
+            frame = frame.sort_values(by='date_created', kind='stable', ignore_index=True)
+        self.frame = frame
@@ -0,0 +1,146 @@
+import io
+import time
+import uuid
+from urllib.parse import quote
+
+import requests
+
+CHUNK_SIZE = 64 * 1024
+
+# Size of each request body in a resumable upload
+UPLOAD_CHUNK_SIZE = 2 * 1024 * 1024
+
+
+class MultipartStream(io.RawIOBase):
+    """
+    A multipart/form-data body that streams a single file field straight from an
+    in-memory buffer.
+
+    The file content is never copied in user space: `read` hands out memoryview
+    slices of the buffer, and the known length lets requests send a
+    Content-Length header instead of chunked encoding.
+    """
+
+    def __init__(self, field, filename, buffer, content_type="application/octet-stream"):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = (f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n').encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        self._parts = [memoryview(head), memoryview(buffer).cast('B'), memoryview(tail)]
+        self._length = sum(part.nbytes for part in self._parts)
+        self._pos = 0
+
+    def __len__(self):
+        return self._length - self._pos
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        # Needed so urllib3 can rewind the body on a retried request
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._length
+        self._pos = min(max(pos, 0), self._length)
+        return self._pos
+
+    def read(self, size=CHUNK_SIZE):
+        if size is None or size < 0:
+            size = self._length - self._pos
+        offset = self._pos
+        for part in self._parts:
+            if offset < part.nbytes:
+                chunk = part[offset:offset + size]
+                self._pos += chunk.nbytes
+                return chunk
+            offset -= part.nbytes
+        return b''
+
+    def __iter__(self):
+        while chunk := self.read(CHUNK_SIZE):
+            yield chunk
+
+    def close(self):
+        self._parts = []
+        super().close()
+
+
+def post_file(client, endpoint, field, filename, buffer, content_type="application/octet-stream", **kwargs):
+    """POST an in-memory buffer as a single-file multipart form without a temporary file."""
+    body = MultipartStream(field, filename, buffer, content_type)
+    try:
+        headers = {**kwargs.pop('headers', {}), 'Content-Type': body.content_type}
+        return client.post(endpoint, data=body, headers=headers, **kwargs)
+    finally:
+        body.close()
+
+
+def _remote_offset(client, endpoint, upload_id):
+    """Ask the server how many bytes of `upload_id` it already holds."""
+    response = client.get(f"{endpoint}/status", params={'upload_id': upload_id})
+    return response.json()['offset'] if response.status_code == 200 else 0
+
+
+def upload_chunked(client, endpoint, filename, buffer, upload_id, chunk_size=UPLOAD_CHUNK_SIZE,
+                   on_progress=None, max_attempts=5):
+    """
+    Upload `buffer` to `{endpoint}/chunk` as fixed-size chunks tagged with their offset.
+
+    A chunk that fails, by a connection error or a 5xx from a gateway, is
+    retried with backoff from the offset the server reports, so a dropped
+    connection only costs the chunk in flight. Reusing `upload_id` on a later
+    call resumes from `{endpoint}/status`. `filename` is sent percent-encoded.
+    Returns the response to the final chunk, which carries the server's result.
+    """
+    data = memoryview(buffer).cast('B')
+    total = data.nbytes
+    offset = _remote_offset(client, endpoint, upload_id)
+    attempts = 0
+
+    while True:
+        if on_progress:
+            on_progress(offset, total)
+        headers = {
+            'Upload-Id': upload_id,
+            'Upload-Offset': str(offset),
+            'Upload-Length': str(total),
+            # Header values must be Latin-1, so the name is percent-encoded UTF-8
+            'X-Filename': quote(filename),
+            'Content-Type': "application/octet-stream",
+        }
+        try:
+            response = client.post(f"{endpoint}/chunk", data=data[offset:offset + chunk_size], headers=headers)
+            if response.status_code >= 500:
+                # A gateway or tunnel error: the chunk may or may not have landed
+                response.raise_for_status()
+        except requests.RequestException:
+            attempts += 1
+            if attempts >= max_attempts:
+                raise
+            time.sleep(0.5 * 2 ** (attempts - 1))
+            # Continue from wherever the server got to; if it can't say, retry the same chunk
+            try:
+                offset = _remote_offset(client, endpoint, upload_id) or offset
+            except requests.RequestException:
+                pass
+            continue
+
+        if response.status_code == 409:
+            # Server and client disagree on the offset: continue from the server's
+            offset = response.json()['offset']
+        elif response.status_code == 202:
+            attempts = 0
+            offset = response.json()['offset']
+        else:
+            if on_progress and response.status_code == 200:
+                on_progress(total, total)
+            return response
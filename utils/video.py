@@ -0,0 +1,180 @@
+import io
+import os
+import threading
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from utils.spool import Spool
+
+FACE_CASCADE_PATH = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+
+# Side length of the square face crops sent to the backend
+FACE_SIZE = 96
+# Frames are downscaled to this width for face detection
+DETECT_WIDTH = 320
+# Number of images per request
+FACE_BATCH_SIZE = 32
+# Sampled full frames are downscaled to at most this width before upload
+FRAME_WIDTH = 640
+
+# Frame sampling strategies for uploads
+SAMPLING_STRATEGIES = ("every", "rate", "scene")
+# Mean absolute difference (0-255) between thumbnails that counts as a scene change
+SCENE_THRESHOLD = 12.0
+# In scene-change mode, still pick a frame if none was picked for this many seconds
+SCENE_MAX_INTERVAL = 2.0
+
+_local = threading.local()
+
+
+def get_face_cascade():
+    """Return this thread's Haar cascade; classifiers are not safe to share across threads."""
+    if not hasattr(_local, 'face_cascade'):
+        _local.face_cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+    return _local.face_cascade
+
+
+@contextmanager
+def video_file(uploaded_file, spool=None):
+    """Expose an uploaded video as a file path for cv2.VideoCapture, in `spool`, deleting it afterwards."""
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    with (spool or Spool()).file(uploaded_file.getvalue(), suffix) as path:
+        yield path
+
+
+def iter_frames(path, stride=1):
+    """Yield `(index, frame_count, frame)` for every `stride`-th frame of the video at `path`."""
+    capture = cv2.VideoCapture(path)
+    try:
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        index = 0
+        while capture.grab():
+            if index % stride == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    yield index, frame_count, frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def video_fps(path, default=25.0):
+    capture = cv2.VideoCapture(path)
+    try:
+        return capture.get(cv2.CAP_PROP_FPS) or default
+    finally:
+        capture.release()
+
+
+def sample_frames(path, strategy="rate", rate=1.0, scene_threshold=SCENE_THRESHOLD):
+    """
+    Yield `(index, frame_count, frame)` for the frames of the video picked by `strategy`:
+
+    - "every": all frames
+    - "rate": `rate` frames per second of video; skipped frames are never converted
+    - "scene": frames whose small grayscale thumbnail differs from the last picked
+      one by more than `scene_threshold`, plus one every SCENE_MAX_INTERVAL seconds
+    """
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy: {strategy}")
+
+    fps = video_fps(path)
+    if strategy == "every":
+        yield from iter_frames(path)
+        return
+    if strategy == "rate":
+        yield from iter_frames(path, stride=max(1, round(fps / rate)))
+        return
+
+    max_gap = round(fps * SCENE_MAX_INTERVAL)
+    last_thumb, last_index = None, None
+    for index, frame_count, frame in iter_frames(path):
+        thumb = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 36), interpolation=cv2.INTER_AREA)
+        thumb = thumb.astype(np.int16)
+        if (last_thumb is None or index - last_index >= max_gap
+                or np.abs(thumb - last_thumb).mean() > scene_threshold):
+            last_thumb, last_index = thumb, index
+            yield index, frame_count, frame
+
+
+def crop_faces(frame, size=FACE_SIZE, grayscale=True):
+    """Detect faces in a BGR frame and return them as square `size` x `size` crops."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    # Detect on a downscaled copy; the cascade cost grows with the pixel count
+    scale = min(1.0, DETECT_WIDTH / gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    faces = get_face_cascade().detectMultiScale(small, scaleFactor=1.2, minNeighbors=5, minSize=(32, 32))
+
+    source = gray if grayscale else frame
+    crops = []
+    for x, y, w, h in faces:
+        x, y, w, h = (int(v / scale) for v in (x, y, w, h))
+        crops.append(cv2.resize(source[y:y + h, x:x + w], (size, size), interpolation=cv2.INTER_AREA))
+    return crops
+
+
+def encode_jpeg(image, quality=90):
+    ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Could not encode image as JPEG")
+    return data.tobytes()
+
+
+def iter_face_crops(frames, size=FACE_SIZE, grayscale=True):
+    """Yield `(index, frame_count, crop)` for every face found in `frames`."""
+    for index, frame_count, frame in frames:
+        for face in crop_faces(frame, size, grayscale):
+            yield index, frame_count, face
+
+
+def iter_resized(frames, width=FRAME_WIDTH):
+    """Yield `frames` downscaled to at most `width` pixels wide."""
+    for index, frame_count, frame in frames:
+        if frame.shape[1] > width:
+            scale = width / frame.shape[1]
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        yield index, frame_count, frame
+
+
+def iter_jpegs(images, quality=90):
+    """Yield `(index, frame_count, JPEG bytes)` for `(index, frame_count, image)` items."""
+    for index, frame_count, image in images:
+        yield index, frame_count, encode_jpeg(image, quality)
+
+
+def pack_npz(images):
+    """Pack same-sized images into one compressed .npz holding a `(N, H, W[, C])` uint8 array."""
+    arrays = [image for _, _, image in images]
+    buffer = io.BytesIO()
+    if arrays:
+        np.savez_compressed(buffer, faces=np.stack(arrays))
+    else:
+        np.savez_compressed(buffer, faces=np.empty((0, FACE_SIZE, FACE_SIZE), np.uint8))
+    return buffer.getvalue()
+
+
+def upload_image_batches(client, endpoint, images, upload_id, field='faces', batch_size=FACE_BATCH_SIZE):
+    """
+    Send JPEG images to `endpoint` in batches of `batch_size` under one `upload_id`.
+
+    Every batch but the last is acknowledged with 202; the last is sent with
+    final=1 and its response carries the emotion for the whole video.
+    """
+    batch = []
+    for index, frame_count, jpg_data in images:
+        batch.append((field, (f"{index}_{len(batch)}.jpg", jpg_data, "image/jpeg")))
+        if len(batch) == batch_size:
+            response = client.post(endpoint, data={'upload_id': upload_id, 'final': 0}, files=batch)
+            if response.status_code != 202:
+                return response
+            batch = []
+    return client.post(endpoint, data={'upload_id': upload_id, 'final': 1}, files=batch or None)
+
+
+def upload_npz(client, endpoint, images, upload_id, field='faces'):
+    """Send all images as a single compressed .npz in one final request."""
+    files = [(field, (f"{field}.npz", pack_npz(images), "application/x-npz"))]
+    return client.post(endpoint, data={'upload_id': upload_id, 'final': 1}, files=files)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import requests
+
+from utils.mjpeg import MjpegDemuxer, parse_boundary
+
+# Stop a reader whose page has not polled it for this many seconds (e.g. the tab was closed)
+IDLE_TIMEOUT = 10.0
+
+
+def iter_available(response, size=16 * 1024):
+    """Yield up to `size` bytes as soon as they arrive instead of waiting for a full chunk."""
+    raw = response.raw
+    if hasattr(raw, 'read1'):
+        while chunk := raw.read1(size, decode_content=True):
+            yield chunk
+    else:
+        # urllib3 < 2.3: small reads keep the latency of the blocking read low
+        yield from response.iter_content(chunk_size=1024)
+
+
+class FeedReader:
+    """
+    Consumes the MJPEG webcam feed on a background thread.
+
+    Only the newest frame is kept, in a single slot guarded by a lock, so a slow
+    page never builds a backlog. The reader stops when `stop` is called, when the
+    stream ends or fails, or when nobody has polled it for `idle_timeout` seconds,
+    which is how readers of disconnected sessions get cleaned up.
+
+    The stream holds its connection for the whole session, so it uses a session
+    of its own rather than a connection from the client's shared pool.
+    """
+
+    def __init__(self, client, endpoint="/video_feed", idle_timeout=IDLE_TIMEOUT):
+        self.client = client
+        self.endpoint = endpoint
+        self.idle_timeout = idle_timeout
+        self.error = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._frame = None
+        self._seq = 0
+        self._last_poll = time.monotonic()
+        self._response = None
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, name="webcam-feed-reader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def latest(self):
+        """Return `(sequence number, JPEG bytes)` of the newest frame, or `(0, None)`."""
+        with self._lock:
+            self._last_poll = time.monotonic()
+            return self._seq, self._frame
+
+    def stop(self, timeout=2.0):
+        """Stop the reader and wait briefly for its thread to exit."""
+        self._stop.set()
+        self._close_response()
+        self._session.close()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _close_response(self):
+        # Closing the response unblocks a read that is waiting on the socket
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def _idle(self):
+        with self._lock:
+            return time.monotonic() - self._last_poll > self.idle_timeout
+
+    def _run(self):
+        try:
+            self._response = self._session.get(self.client.base_url + self.endpoint, stream=True,
+                                               timeout=self.client.timeout)
+            if self._stop.is_set():
+                return
+            self._response.raise_for_status()
+            demuxer = MjpegDemuxer(parse_boundary(self._response.headers.get('Content-Type')))
+
+            for chunk in iter_available(self._response):
+                if self._stop.is_set() or self._idle():
+                    break
+                frames = demuxer.feed(chunk)
+                if frames:
+                    with self._lock:
+                        self._frame = frames[-1]
+                        self._seq += 1
+        except Exception as e:
+            # Errors raised because stop() closed the response are expected
+            if not self._stop.is_set():
+                self.error = e
+        finally:
+            self._stop.set()
+            self._close_response()
+            self._session.close()